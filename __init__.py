@@ -1,18 +1,35 @@
 from flask import Flask
 from config import Config
-from models import db, ensure_admin_exists
+from models import db, ensure_admin_exists, ensure_indexes, ensure_sequences
+from database import configure_database, init_database
 from routes import routes, login_manager
+from cli import register_commands
+from user_cache import init_user_cache
+from metrics import init_metrics
+from query_checks import init_query_checks
+from salary_history import ensure_salary_versions
+from payroll_summary import ensure_payroll_summary
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
 
+    configure_database(app)
     db.init_app(app)
+    init_database(app, db)
     login_manager.init_app(app)
+    init_user_cache(app)
+    init_metrics(app)
+    init_query_checks(app)
 
     app.register_blueprint(routes)
+    register_commands(app)
 
     # ✅ Ensure admin exists on first run
     ensure_admin_exists(app)
+    ensure_indexes(app)
+    ensure_sequences(app)
+    ensure_salary_versions(app)
+    ensure_payroll_summary(app)
 
     return app
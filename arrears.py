@@ -0,0 +1,161 @@
+# arrears.py
+"""
+Arrears for back-dated increments.
+
+Months that were already paid are never rewritten. Instead, every finalized
+SalaryRecord (net_salary > 0) from the increment's effective month up to the
+payout month is recomputed with the base salary now in force for that month
+(salary history), EPF/ESI/PT included. The difference in net pay, less any
+arrears already raised for that month, becomes an ArrearsLine paid with the
+payout month's salary as a reimbursement.
+
+Records are loaded in one query and recomputed one month at a time with the
+column-wise salary engine, so a whole department over many months is a few
+queries and array operations.
+"""
+import bisect
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import and_, func, insert, or_
+
+from models import db, Staff, SalaryRecord, SalaryVersion, ArrearsLine, DEDUCTION_COLUMNS
+from pt_slabs import PT_MONTHS, get_slab_index
+from salary_history import month_start
+from utils import calculate_salary_components_batch
+
+
+def _period_on_or_after(start):
+    return or_(SalaryRecord.year > start.year,
+               and_(SalaryRecord.year == start.year, SalaryRecord.month >= start.month))
+
+
+def _period_before(end):
+    return or_(SalaryRecord.year < end.year,
+               and_(SalaryRecord.year == end.year, SalaryRecord.month < end.month))
+
+
+def _salary_lookup(staff_ids):
+    """{Staff.id: (sorted effective_from list, amounts)} from one salary history query."""
+    history = defaultdict(lambda: ([], []))
+    for staff_id, effective_from, amount in db.session.query(
+            SalaryVersion.staff_id, SalaryVersion.effective_from, SalaryVersion.amount
+    ).filter(SalaryVersion.staff_id.in_(staff_ids)).order_by(SalaryVersion.staff_id, SalaryVersion.effective_from):
+        history[staff_id][0].append(effective_from)
+        history[staff_id][1].append(amount)
+    return history
+
+
+def compute_arrears(condition, effective_from, payout_month=None, payout_year=None):
+    """
+    Raise ArrearsLines for the staff matching `condition` whose finalized
+    records from `effective_from` (date or 'YYYY-MM[-DD]') up to, but not
+    including, the payout month (default: the current month) are short of
+    what their current salary history gives.
+
+    Returns {"records": int, "staff": int, "total": float}. The caller commits.
+    """
+    start = month_start(effective_from)
+    if payout_month is None:
+        today = date.today()
+        payout_month, payout_year = today.month, today.year
+    payout = date(payout_year, payout_month, 1)
+    summary = {"records": 0, "staff": 0, "total": 0.0}
+    if start >= payout:
+        return summary
+
+    records = db.session.query(
+        SalaryRecord.staff_id, SalaryRecord.year, SalaryRecord.month, SalaryRecord.lop_days,
+        SalaryRecord.total_reimbursements, SalaryRecord.net_salary,
+        *[getattr(SalaryRecord, c) for c in DEDUCTION_COLUMNS],
+        Staff.base_salary, Staff.allowances, Staff.epf_eligible, Staff.esi_eligible,
+    ).join(Staff, SalaryRecord.staff_id == Staff.id) \
+        .filter(condition, SalaryRecord.net_salary > 0,
+                _period_on_or_after(start), _period_before(payout)) \
+        .all()
+    if not records:
+        return summary
+
+    staff_ids = {r.staff_id for r in records}
+    history = _salary_lookup(staff_ids)
+    already_raised = {
+        (staff_id, year, month): amount
+        for staff_id, year, month, amount in db.session.query(
+            ArrearsLine.staff_id, ArrearsLine.year, ArrearsLine.month, func.sum(ArrearsLine.amount)
+        ).filter(ArrearsLine.staff_id.in_(staff_ids))
+         .group_by(ArrearsLine.staff_id, ArrearsLine.year, ArrearsLine.month)
+    }
+    slab_index = None
+
+    by_period = defaultdict(list)
+    for r in records:
+        by_period[(r.year, r.month)].append(r)
+
+    lines = []
+    for (year, month), group in sorted(by_period.items()):
+        period = date(year, month, 1)
+        base = []
+        for r in group:
+            dates, amounts = history.get(r.staff_id, ([], []))
+            i = bisect.bisect_right(dates, period) - 1
+            base.append(amounts[i] if i >= 0 else r.base_salary)
+
+        deductions = {c: [getattr(r, c) or 0 for r in group] for c in DEDUCTION_COLUMNS}
+        if month in PT_MONTHS:
+            slab_index = slab_index or get_slab_index()
+            deductions["professional_tax"] = [slab_index.tax_for(b) for b in base]
+
+        result = calculate_salary_components_batch(
+            gross_salary=[b + (r.allowances or 0) for b, r in zip(base, group)],
+            lop_days=[r.lop_days or 0 for r in group],
+            deductions=deductions,
+            reimbursements=[r.total_reimbursements or 0 for r in group],
+            month=month,
+            year=year,
+            epf_eligible=[bool(r.epf_eligible) for r in group],
+            esi_eligible=[bool(r.esi_eligible) for r in group],
+        )
+
+        for i, r in enumerate(group):
+            new_net = float(result["net_salary"][i])
+            amount = round(new_net - r.net_salary - already_raised.get((r.staff_id, year, month), 0), 2)
+            if abs(amount) < 0.01:
+                continue
+            lines.append({
+                "staff_id": r.staff_id,
+                "year": year,
+                "month": month,
+                "payout_year": payout_year,
+                "payout_month": payout_month,
+                "old_net": r.net_salary,
+                "new_net": new_net,
+                "amount": amount,
+            })
+
+    if lines:
+        db.session.execute(insert(ArrearsLine), lines)
+    summary.update(records=len(lines),
+                   staff=len({line["staff_id"] for line in lines}),
+                   total=round(sum(line["amount"] for line in lines), 2))
+    return summary
+
+
+def arrears_due(month, year, staff_ids=None, unsettled_only=False):
+    """{Staff.id: total arrears} to be paid with the month/year payroll."""
+    query = db.session.query(ArrearsLine.staff_id, func.sum(ArrearsLine.amount)) \
+        .filter(ArrearsLine.payout_month == month, ArrearsLine.payout_year == year)
+    if staff_ids is not None:
+        query = query.filter(ArrearsLine.staff_id.in_(staff_ids))
+    if unsettled_only:
+        query = query.filter(ArrearsLine.settled.is_(False))
+    return {staff_id: round(total or 0, 2) for staff_id, total in query.group_by(ArrearsLine.staff_id)}
+
+
+def settle_arrears(month, year, staff_ids):
+    """Mark the month/year arrears of `staff_ids` as included in a saved salary record."""
+    if not staff_ids:
+        return
+    db.session.query(ArrearsLine) \
+        .filter(ArrearsLine.payout_month == month, ArrearsLine.payout_year == year,
+                ArrearsLine.staff_id.in_(staff_ids)) \
+        .update({ArrearsLine.settled: True}, synchronize_session=False)
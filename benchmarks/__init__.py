@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+"""
+Performance benchmarks for the payroll engine. Run modules with
+`python -m benchmarks.<name>`; `benchmarks.suite` runs the end-to-end
+scenarios on data from `benchmarks.datagen` and writes JSON results.
+"""
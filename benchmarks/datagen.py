@@ -0,0 +1,164 @@
+# benchmarks/datagen.py
+"""
+Seeded synthetic data for the benchmarks: N staff across departments, M
+finalized months of SalaryRecord history and a realistic set of PT slabs,
+written to a local SQLite database.
+
+    python -m benchmarks.datagen --staff 10000 --months 6 --db /tmp/payroll_bench.db
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date
+
+from sqlalchemy import insert
+
+from models import db, Staff, ProfessionalTax, ensure_sequences
+from payroll import run_payroll
+from pt_slabs import bump_slab_version, invalidate_slab_index
+from records import upsert_salary_records
+from salary_history import record_baseline_versions
+from staff_search import bump_staff_version
+
+DEPARTMENTS = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT", "AI&DS", "MBA", "Science & Humanities", "Admin"]
+DESIGNATIONS = {
+    "Teaching": [("Professor", 90000, 160000), ("Associate Professor", 60000, 95000),
+                 ("Assistant Professor", 30000, 60000)],
+    "Non-Teaching": [("Lab Assistant", 15000, 28000), ("Office Assistant", 14000, 24000),
+                     ("Accountant", 22000, 45000)],
+    "House-Keeping": [("House Keeper", 10000, 16000)],
+    "Driver": [("Driver", 14000, 22000)],
+    "Admin": [("Administrative Officer", 40000, 80000)],
+}
+CATEGORY_WEIGHTS = [("Teaching", 55), ("Non-Teaching", 25), ("House-Keeping", 8), ("Driver", 7), ("Admin", 5)]
+
+# Half-yearly professional tax slabs (range_from, range_to, tax_amount)
+PT_SLABS = [
+    (0, 21000, 0),
+    (21001, 30000, 135),
+    (30001, 45000, 315),
+    (45001, 60000, 690),
+    (60001, 75000, 1025),
+    (75001, 10000000, 1250),
+]
+
+BATCH_SIZE = 5000
+FIRST_STAFF_ID = 1001
+
+
+def sqlite_config(path, base=None):
+    """Config class pointing the app at a SQLite file (and a cache dir next to it)."""
+    from config import Config
+
+    class BenchmarkConfig(base or Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.abspath(path)}"
+        REPORT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(path)), "report_cache")
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    return BenchmarkConfig
+
+
+def history_months(months, today=None):
+    """The `months` (year, month) pairs before the current month, oldest first."""
+    today = today or date.today()
+    year, month = today.year, today.month
+    periods = []
+    for _ in range(months):
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+        periods.append((year, month))
+    return list(reversed(periods))
+
+
+def _staff_rows(count, rng):
+    categories, weights = zip(*CATEGORY_WEIGHTS)
+    rows = []
+    for i in range(count):
+        category = rng.choices(categories, weights)[0]
+        designation, low, high = rng.choice(DESIGNATIONS[category])
+        rows.append({
+            "staff_id": FIRST_STAFF_ID + i,
+            "name": f"Staff {i:06d} {rng.choice('ABCDEFGHIJKLMNOPRSTV')}.",
+            "category": category,
+            "department": "Admin" if category == "Admin" else rng.choice(DEPARTMENTS[:-1]),
+            "designation": designation,
+            "base_salary": float(rng.randrange(low, high, 100)),
+            "allowances": rng.choice([0.0, 0.0, 500.0, 1000.0, 2500.0]),
+            "deductions": 0.0,
+            "epf_eligible": rng.random() < 0.8,
+            "esi_eligible": rng.random() < 0.25,
+            "date_joined": date(rng.randrange(2005, 2024), rng.randrange(1, 13), rng.randrange(1, 29)),
+            "bank_account": str(rng.randrange(10**11, 10**12)),
+            "aadhar": str(rng.randrange(10**11, 10**12)),
+            "active": True,
+        })
+    return rows
+
+
+def generate(app, staff_count, months, seed=42):
+    """
+    Fill the app's (empty) database. Each history month gets draft records with
+    LOP days and per-head deductions for a random share of staff, then a bulk
+    payroll run finalizes every record. Returns {"staff": int, "periods": [...]}.
+    """
+    rng = random.Random(seed)
+    with app.app_context():
+        db.session.execute(insert(ProfessionalTax), [
+            {"range_from": lo, "range_to": hi, "tax_amount": tax} for lo, hi, tax in PT_SLABS
+        ])
+        bump_slab_version()
+        invalidate_slab_index()
+
+        rows = _staff_rows(staff_count, rng)
+        for start in range(0, len(rows), BATCH_SIZE):
+            db.session.execute(insert(Staff), rows[start:start + BATCH_SIZE])
+        record_baseline_versions()
+        bump_staff_version()
+        db.session.commit()
+        ensure_sequences(app)
+
+        staff_pks = [pk for (pk,) in db.session.query(Staff.id).order_by(Staff.id)]
+        periods = history_months(months)
+        for year, month in periods:
+            drafts = []
+            for pk in staff_pks:
+                if rng.random() < 0.2:
+                    drafts.append({
+                        "staff_id": pk, "year": year, "month": month, "gross_salary": 0, "net_salary": 0,
+                        "lop_days": rng.choice([0.5, 1, 1, 2, 3]),
+                        "loan": rng.choice([0.0, 0.0, 2000.0, 5000.0]),
+                        "advance": rng.choice([0.0, 0.0, 1000.0]),
+                        "misc": rng.choice([0.0, 0.0, 250.0]),
+                    })
+            for start in range(0, len(drafts), BATCH_SIZE):
+                upsert_salary_records(drafts[start:start + BATCH_SIZE])
+            db.session.commit()
+            run_payroll(month, year)
+    return {"staff": staff_count, "periods": periods}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic payroll database.")
+    parser.add_argument("--staff", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default="payroll_bench.db")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} already exists")
+
+    from __init__ import create_app
+
+    started = time.perf_counter()
+    app = create_app(sqlite_config(args.db))
+    result = generate(app, args.staff, args.months, seed=args.seed)
+    print(f"Generated {result['staff']} staff x {len(result['periods'])} months into {args.db} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/payslips.py
+"""
+Payslips rendered per second into a ZIP, by process-pool worker count.
+
+    python -m benchmarks.payslips [--count 2000] [--workers 1 2 4 8]
+"""
+import argparse
+import io
+import os
+import random
+import time
+
+from payslips import DEDUCTION_LINES, write_payslips_zip
+
+
+def make_payslips(count, seed=42):
+    """Synthetic payslip dicts shaped like payslips.get_payslip_data() output."""
+    rng = random.Random(seed)
+    payslips = []
+    for i in range(count):
+        gross = round(rng.uniform(12000, 180000), 2)
+        lop_days = rng.choice([0, 0, 0, 1, 2])
+        lop_amount = round(lop_days / 28 * gross, 2)
+        epf = float(int(gross * 0.084))
+        esi = float(int(gross * 0.0075)) if rng.random() < 0.3 else 0.0
+        data = {
+            "id": i + 1, "month": 2, "year": 2025, "staff_id": 1001 + i,
+            "name": f"Staff {i}", "department": rng.choice(["CSE", "ECE", "MECH", "CIVIL"]),
+            "designation": rng.choice(["Professor", "Assistant Professor", "Lab Assistant"]),
+            "bank_account": f"{rng.randrange(10**11, 10**12)}", "pf_number": None, "esi_number": None,
+            "gross_salary": gross - lop_amount, "lop_days": lop_days, "lop_amount": lop_amount,
+            "epf": epf, "esi": esi, "professional_tax": 1250.0,
+            "total_reimbursements": rng.choice([0.0, 1500.0]),
+        }
+        for _, column in DEDUCTION_LINES:
+            data[column] = rng.choice([0.0, 0.0, 0.0, 500.0])
+        data["total_deductions"] = epf + esi + 1250.0 + sum(data[c] for _, c in DEDUCTION_LINES)
+        data["net_salary"] = data["gross_salary"] - data["total_deductions"] + data["total_reimbursements"]
+        payslips.append(data)
+    return payslips
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    args = parser.parse_args()
+
+    payslips = make_payslips(args.count)
+    print(f"{'workers':>8} {'seconds':>9} {'payslips/s':>11} {'zip (MB)':>9}")
+    for workers in args.workers:
+        output = io.BytesIO()
+        start = time.perf_counter()
+        write_payslips_zip(payslips, output, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {elapsed:>9.2f} {args.count / elapsed:>11.0f} {output.tell() / 2**20:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
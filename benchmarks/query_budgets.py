@@ -0,0 +1,85 @@
+# benchmarks/query_budgets.py
+"""
+Query-count budgets for the report pages, checked against generated databases
+of two sizes so a per-row query (N+1) shows up as a budget failure no matter
+how fast the machine is.
+
+    python -m benchmarks.query_budgets [--scales 50 500] [--months 2]
+
+Exits non-zero when any page executes more statements than its budget.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from benchmarks.datagen import generate, sqlite_config
+from models import db
+from query_checks import QueryBudgetExceeded, query_budget
+
+# (label, URL template, max statements); {month}/{year} is the latest generated month
+BUDGETS = [
+    ("salary_overview", "/salary_overview?month={month}&year={year}", 3),
+    ("dashboard", "/dashboard", 5),
+    ("api_lop", "/api/lop?month={month}&year={year}", 2),
+    ("export_salary_excel", "/export_salary_excel?month={month}&year={year}", 3),
+    ("export_salary_pdf", "/export_salary_pdf?month={month}&year={year}", 3),
+    ("lop_page", "/lop?month={year}-{month:02d}", 3),
+    ("d_r_page", "/d_r", 2),
+]
+
+
+def check_scale(scale, months, workdir):
+    """Run every budgeted page once on a fresh database; return [(label, count, budget, error)]."""
+    from __init__ import create_app
+
+    app = create_app(sqlite_config(os.path.join(workdir, f"budget_{scale}.db")))
+    year, month = generate(app, scale, months)["periods"][-1]
+    client = app.test_client()
+    client.post('/login', data={'username': 'super', 'password': 'super123'})
+    client.get('/dashboard')  # warm the user cache and lookup tables
+
+    results = []
+    with app.app_context():
+        for label, url, budget in BUDGETS:
+            shutil.rmtree(app.config['REPORT_CACHE_DIR'], ignore_errors=True)
+            error = None
+            guard = query_budget(budget)
+            try:
+                with guard:
+                    response = client.get(url.format(month=month, year=year))
+                    b"".join(response.response)
+                    response.close()
+                    if response.status_code != 200:
+                        error = f"HTTP {response.status_code}"
+            except QueryBudgetExceeded as e:
+                error = str(e)
+            results.append((label, guard.count, budget, error))
+        db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check query-count budgets of the report pages.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--months", type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="payroll_budget_")
+    failures = 0
+    try:
+        for scale in args.scales:
+            for label, count, budget, error in check_scale(scale, args.months, workdir):
+                status = "FAIL" if error else "ok"
+                print(f"[{scale}] {label:<22} {count:4d} / {budget:<3d} {status}")
+                if error:
+                    print(f"        {error[:300]}")
+                    failures += 1
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/salary_components.py
+"""
+Compare the scalar calculate_salary_components loop against the vectorized
+calculate_salary_components_batch at 1k, 10k and 100k employees.
+
+    python -m benchmarks.salary_components [--sizes 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from utils import calculate_salary_components, calculate_salary_components_batch
+
+DEDUCTION_KEYS = ["it", "loan", "advance", "uniform", "cd", "hostel", "suspense", "misc"]
+MONTH, YEAR = 2, 2025
+
+
+def make_columns(size, seed=42):
+    """Build a reproducible set of per-employee input columns."""
+    rng = random.Random(seed)
+    return {
+        "gross": [round(rng.uniform(12000, 180000), 2) for _ in range(size)],
+        "lop": [rng.choice([0, 0, 0, 0.5, 1, 1.5, 2, 3]) for _ in range(size)],
+        "deductions": {
+            key: [rng.choice([0, 0, 0, round(rng.uniform(100, 5000), 2)]) for _ in range(size)]
+            for key in DEDUCTION_KEYS
+        },
+        "reimbursements": [rng.choice([0, 0, round(rng.uniform(200, 3000), 2)]) for _ in range(size)],
+        "epf": [rng.random() < 0.8 for _ in range(size)],
+        "esi": [rng.random() < 0.3 for _ in range(size)],
+    }
+
+
+def run_scalar(cols):
+    results = []
+    for i in range(len(cols["gross"])):
+        results.append(calculate_salary_components(
+            gross_salary=cols["gross"][i],
+            lop_days=cols["lop"][i],
+            deductions={key: cols["deductions"][key][i] for key in DEDUCTION_KEYS},
+            reimbursements=[cols["reimbursements"][i]],
+            month=MONTH,
+            year=YEAR,
+            epf_eligible=cols["epf"][i],
+            esi_eligible=cols["esi"][i],
+        ))
+    return results
+
+
+def run_batch(cols):
+    return calculate_salary_components_batch(
+        gross_salary=cols["gross"],
+        lop_days=cols["lop"],
+        deductions=cols["deductions"],
+        reimbursements=cols["reimbursements"],
+        month=MONTH,
+        year=YEAR,
+        epf_eligible=cols["epf"],
+        esi_eligible=cols["esi"],
+    )
+
+
+def assert_identical(scalar, batch):
+    """Fail loudly if any batch value differs from the scalar reference."""
+    for key, column in batch.items():
+        expected = np.array([row[key] for row in scalar], dtype=column.dtype)
+        if not np.array_equal(expected, column):
+            bad = int(np.flatnonzero(expected != column)[0])
+            raise AssertionError(f"{key} differs at row {bad}: {expected[bad]!r} != {column[bad]!r}")
+
+
+def best_of(fn, cols, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(cols)
+        timings.append(time.perf_counter() - start)
+    return min(timings), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'employees':>10} {'scalar (s)':>12} {'batch (s)':>12} {'speedup':>9}")
+    for size in args.sizes:
+        cols = make_columns(size)
+        scalar_time, scalar_out = best_of(run_scalar, cols, args.repeat)
+        batch_time, batch_out = best_of(run_batch, cols, args.repeat)
+        assert_identical(scalar_out, batch_out)
+        print(f"{size:>10} {scalar_time:>12.4f} {batch_time:>12.4f} {scalar_time / batch_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
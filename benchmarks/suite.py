@@ -0,0 +1,212 @@
+# benchmarks/suite.py
+"""
+End-to-end payroll benchmarks at several data scales, run through the Flask
+test client against a generated SQLite database (see benchmarks.datagen).
+
+    python -m benchmarks.suite [--scales 1000 10000 100000] [--months 3]
+                               [--repeat 3] [--output results.json]
+                               [--compare previous.json] [--skip export_salary_pdf]
+
+Each scale gets a fresh database. Every scenario is timed `repeat` times and
+the best, median and worst wall-clock seconds are written to the JSON output,
+together with enough metadata (seed, months, commit, Python, platform) to
+tell whether two runs are comparable. --compare prints the change in best
+time against an earlier results file and flags regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.datagen import generate, sqlite_config
+from models import db, Staff
+from utils import calculate_salary_components
+
+SCENARIOS = [
+    "calculate_salary_components",
+    "lop_page_post",
+    "d_r_page_post",
+    "salary_overview",
+    "export_salary_excel",
+    "export_salary_pdf",
+]
+REGRESSION_THRESHOLD = 0.10  # flag scenarios more than 10% slower than the baseline
+D_R_SAVES = 20  # D&R saves timed per repeat
+
+
+def _timed(func, repeat):
+    times = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        func(i)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def _consume(response):
+    """Read a (possibly streamed) response to the end; return its size in bytes."""
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    return size
+
+
+def _check(response, what):
+    if response.status_code != 200:
+        raise RuntimeError(f"{what} returned HTTP {response.status_code}")
+    return response
+
+
+class Scenarios:
+    """Scenario callables for one generated database."""
+
+    def __init__(self, app, periods):
+        self.app = app
+        self.client = app.test_client()
+        login = self.client.post('/login', data={'username': 'super', 'password': 'super123'})
+        if 'login' in login.headers.get('Location', 'login'):
+            raise RuntimeError("could not log in as the super user")
+        self.year, self.month = periods[-1]   # latest finalized month
+        self.open_month = f"{periods[-1][0]}-{periods[-1][1]:02d}"
+        with app.app_context():
+            self.staff = [(pk, sid) for pk, sid in db.session.query(Staff.id, Staff.staff_id)
+                          .filter(Staff.active.is_(True)).order_by(Staff.id)]
+
+    def calculate_salary_components(self, i):
+        for n in range(len(self.staff)):
+            calculate_salary_components(
+                gross_salary=30000 + n % 90000, lop_days=n % 3, deductions={"loan": 500},
+                reimbursements=[250], month=self.month, year=self.year,
+                epf_eligible=n % 5 != 0, esi_eligible=n % 4 == 0)
+
+    def lop_page_post(self, i):
+        # Different values on each repeat so every row is actually written
+        form = {'lop_month': self.open_month}
+        form.update({f'lop_{pk}': str((n + i) % 3) for n, (pk, _) in enumerate(self.staff)})
+        _check(self.client.post('/lop', data=form), "lop_page POST")
+
+    def d_r_page_post(self, i):
+        for n in range(D_R_SAVES):
+            pk, _ = self.staff[(i * D_R_SAVES + n) % len(self.staff)]
+            _check(self.client.post('/d_r', data={
+                'employee_name': str(pk), 'salary_month': self.open_month,
+                'loan': '1000', 'misc': str(i), 'reimbursement_amount[]': ['500'],
+            }), "d_r_page POST")
+
+    def salary_overview(self, i):
+        _check(self.client.get(f'/salary_overview?month={self.month}&year={self.year}'), "salary_overview")
+
+    def export_salary_excel(self, i):
+        _consume(_check(self.client.get(f'/export_salary_excel?month={self.month}&year={self.year}'),
+                        "export_salary_excel"))
+
+    def export_salary_pdf(self, i):
+        # Cold render every time: drop the cached PDF first
+        shutil.rmtree(self.app.config['REPORT_CACHE_DIR'], ignore_errors=True)
+        _consume(_check(self.client.get(f'/export_salary_pdf?month={self.month}&year={self.year}'),
+                        "export_salary_pdf"))
+
+
+def run_scale(scale, months, repeat, seed, skip, workdir):
+    from __init__ import create_app
+
+    db_path = os.path.join(workdir, f"bench_{scale}.db")
+    started = time.perf_counter()
+    app = create_app(sqlite_config(db_path))
+    generated = generate(app, scale, months, seed=seed)
+    print(f"[{scale}] generated {scale} staff x {months} months in {time.perf_counter() - started:.1f}s")
+
+    scenarios = Scenarios(app, generated["periods"])
+    results = []
+    for name in SCENARIOS:
+        if name in skip:
+            continue
+        times = _timed(getattr(scenarios, name), repeat)
+        entry = {
+            "scale": scale, "scenario": name, "repeat": repeat,
+            "best": min(times), "median": statistics.median(times), "worst": max(times),
+        }
+        results.append(entry)
+        print(f"[{scale}] {name:<28} best {entry['best']:8.3f}s  median {entry['median']:8.3f}s")
+    with app.app_context():
+        db.engine.dispose()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print best-time changes against a previous results file; return the regressions."""
+    with open(baseline_path) as fh:
+        baseline = {(r["scale"], r["scenario"]): r for r in json.load(fh)["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for r in results:
+        old = baseline.get((r["scale"], r["scenario"]))
+        if not old:
+            continue
+        change = (r["best"] - old["best"]) / old["best"] if old["best"] else 0.0
+        flag = "  REGRESSION" if change > REGRESSION_THRESHOLD else ""
+        print(f"  [{r['scale']}] {r['scenario']:<28} {old['best']:8.3f}s -> {r['best']:8.3f}s "
+              f"({change:+.1%}){flag}")
+        if flag:
+            regressions.append(r)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the payroll benchmark suite.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip", nargs="*", default=[], choices=SCENARIOS)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON")
+    parser.add_argument("--workdir", help="where the generated databases go (default: a temp dir)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="payroll_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    try:
+        for scale in args.scales:
+            results.extend(run_scale(scale, args.months, args.repeat, args.seed, set(args.skip), workdir))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "months": args.months,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# cli.py
+"""Flask CLI commands (`flask --app run <command>`)."""
+import click
+
+from models import db
+from payroll import run_payroll
+from payroll_summary import rebuild_payroll_summary
+from payslips import get_payslip_data, write_payslips_zip
+from recompute import recompute_dirty, dirty_status
+from staff_import import import_staff, format_id_ranges, ImportFormatError
+from staff_search import invalidate_staff_index
+
+
+def _parse_month(value):
+    """Parse a YYYY-MM string into (year, month)."""
+    try:
+        year, month = map(int, value.split('-'))
+    except ValueError:
+        raise click.BadParameter("expected YYYY-MM")
+    if not 1 <= month <= 12:
+        raise click.BadParameter("month must be between 01 and 12")
+    return year, month
+
+
+@click.command('run-payroll')
+@click.argument('month_str', metavar='YYYY-MM')
+@click.option('--overwrite', is_flag=True, help="Recompute records that are already finalized.")
+def run_payroll_command(month_str, overwrite):
+    """Finalize every active staff member's salary record for a month."""
+    year, month = _parse_month(month_str)
+    summary = run_payroll(month, year, overwrite=overwrite)
+    click.echo(
+        f"Payroll {month_str}: {summary['created']} created, {summary['updated']} updated, "
+        f"{summary['skipped']} skipped in {summary['elapsed']:.2f}s"
+    )
+
+
+@click.command('import-staff')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_staff_command(path):
+    """Bulk-import staff from a CSV or .xlsx file."""
+    with open(path, 'rb') as fh:
+        try:
+            result = import_staff(fh, path)
+        except ImportFormatError as e:
+            raise click.ClickException(str(e))
+
+    if result['created']:
+        invalidate_staff_index()
+        click.echo(f"Imported {result['created']} staff (IDs {format_id_ranges(result['staff_id_ranges'])})")
+    for entry in result['errors']:
+        click.echo(f"Line {entry['line']} ({entry['name'] or '?'}): {'; '.join(entry['errors'])}", err=True)
+    click.echo(f"{len(result['errors'])} row(s) rejected")
+
+
+@click.command('export-payslips')
+@click.argument('month_str', metavar='YYYY-MM')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option('--workers', type=int, default=None, help="Rendering processes (default: one per CPU core).")
+def export_payslips_command(month_str, output, workers):
+    """Write a month's payslip PDFs into a ZIP, rendered in parallel."""
+    year, month = _parse_month(month_str)
+    payslips = get_payslip_data(month, year)
+    if not payslips:
+        raise click.ClickException(f"No completed salary records for {month_str}")
+    count = write_payslips_zip(payslips, output, workers=workers)
+    click.echo(f"Wrote {count} payslip(s) to {output}")
+
+
+@click.command('rebuild-payroll-summary')
+def rebuild_payroll_summary_command():
+    """Recompute the dashboard's payroll_summary table from salary_records."""
+    groups = rebuild_payroll_summary()
+    db.session.commit()
+    click.echo(f"Rebuilt payroll summary: {groups} month/department group(s)")
+
+
+@click.command('recompute-dirty')
+def recompute_dirty_command():
+    """Recompute every salary record marked stale by an input change."""
+    for year, month, count, reasons in dirty_status():
+        detail = ", ".join(f"{reason}: {n}" for reason, n in sorted(reasons.items()))
+        click.echo(f"{year}-{month:02d}: {count} stale ({detail})")
+    summary = recompute_dirty()
+    click.echo(f"Recomputed {summary['records']} record(s) across {summary['months']} month(s) "
+               f"in {summary['elapsed']:.2f}s")
+
+
+def register_commands(app):
+    app.cli.add_command(run_payroll_command)
+    app.cli.add_command(import_staff_command)
+    app.cli.add_command(export_payslips_command)
+    app.cli.add_command(rebuild_payroll_summary_command)
+    app.cli.add_command(recompute_dirty_command)
@@ -0,0 +1,128 @@
+# database.py
+"""
+Engine configuration and read-replica routing.
+
+configure_database(app) runs before db.init_app() and turns the DB_* settings
+into SQLAlchemy engine options for the primary database and, when
+REPLICA_DATABASE_URL is set, for a 'replica' bind:
+
+- server databases (MySQL, PostgreSQL) get a QueuePool of DB_POOL_SIZE
+  connections plus DB_MAX_OVERFLOW, recycled after DB_POOL_RECYCLE seconds
+  and checked with a pre-ping before use;
+- DB_STATEMENT_TIMEOUT (seconds) is set per connection: max_execution_time
+  on MySQL (SELECTs only), statement_timeout on PostgreSQL. SQLite has no
+  statement timeout;
+- SQLite files are switched to WAL journaling (with SQLITE_WAL), so readers
+  don't block the writer in local and test runs.
+
+Report views decorated with @read_replica send their SELECTs to the replica
+bind; flushes, INSERT/UPDATE/DELETE statements and every other view stay on
+the primary. Without a replica configured the decorator does nothing. Reads
+from a replica can lag the primary by the replication delay.
+"""
+from functools import wraps
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+REPLICA_BIND = 'replica'
+
+
+# -------------------------
+# Engine options
+# -------------------------
+def _is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def engine_options(app, url):
+    """Engine keyword arguments for `url` from the DB_* settings."""
+    options = {"pool_pre_ping": app.config.get('DB_POOL_PRE_PING', True)}
+    if _is_sqlite(url):
+        return options
+
+    options.update(
+        pool_size=app.config.get('DB_POOL_SIZE', 10),
+        max_overflow=app.config.get('DB_MAX_OVERFLOW', 20),
+        pool_recycle=app.config.get('DB_POOL_RECYCLE', 1800),
+        pool_timeout=app.config.get('DB_POOL_TIMEOUT', 30),
+    )
+    timeout = app.config.get('DB_STATEMENT_TIMEOUT')
+    if timeout and make_url(url).get_backend_name() == 'postgresql':
+        options["connect_args"] = {"options": f"-c statement_timeout={int(timeout * 1000)}"}
+    return options
+
+
+def configure_database(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS / SQLALCHEMY_BINDS; call before db.init_app(app)."""
+    primary = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app, primary), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    replica = app.config.get('REPLICA_DATABASE_URL')
+    if replica:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND] = {"url": replica, **engine_options(app, replica)}
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+
+# -------------------------
+# Per-connection settings
+# -------------------------
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def _mysql_statement_timeout(milliseconds):
+    def set_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET SESSION max_execution_time = {milliseconds}")
+        cursor.close()
+    return set_timeout
+
+
+def init_database(app, db):
+    """Attach the per-connection settings to every engine; call after db.init_app(app)."""
+    timeout = app.config.get('DB_STATEMENT_TIMEOUT')
+    with app.app_context():
+        for engine in db.engines.values():
+            backend = engine.url.get_backend_name()
+            if backend == 'sqlite':
+                if app.config.get('SQLITE_WAL', True) and engine.url.database not in (None, '', ':memory:'):
+                    event.listen(engine, 'connect', _sqlite_pragmas)
+            elif backend == 'mysql' and timeout:
+                event.listen(engine, 'connect', _mysql_statement_timeout(int(timeout * 1000)))
+
+
+# -------------------------
+# Read-replica routing
+# -------------------------
+class RoutingSession(Session):
+    """db.session class sending SELECTs of @read_replica views to the replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and has_request_context() and g.get('use_replica')
+                and getattr(clause, 'is_select', False) and not self._flushing):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view):
+    """
+    Serve a read-only view from the replica bind. The flag lives on `g`, so
+    streamed responses (stream_with_context) keep reading from the replica
+    after the view function has returned.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
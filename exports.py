@@ -0,0 +1,121 @@
+# exports.py
+"""
+Serializers for salary report exports. Writers consume SalaryRow iterables
+(see reports.py) one row at a time so exports can stream from the database.
+"""
+import csv
+import io
+import json
+import zlib
+
+import xlsxwriter
+
+# (column header, SalaryRow attribute, treat None as 0) in export order
+EXPORT_COLUMNS = [
+    ("Staff ID", "staff_code", False),
+    ("Name", "name", False),
+    ("Department", "department", False),
+    ("Designation", "designation", False),
+    ("Base Pay", "gross_salary", False),
+    ("LOP Days", "lop_days", False),
+    ("LOP Amount", "lop_amount", False),
+    ("EPF", "epf", False),
+    ("ESI", "esi", False),
+    ("IT", "it", True),
+    ("Loan", "loan", True),
+    ("Advance", "advance", True),
+    ("Uniform", "uniform", True),
+    ("CD", "cd", True),
+    ("Hostel", "hostel", True),
+    ("Suspense", "suspense", True),
+    ("Misc", "misc", True),
+    ("Total Deductions", "total_deductions", False),
+    ("Reimbursements", "total_reimbursements", False),
+    ("Net Salary", "net_salary", False),
+]
+
+
+def export_values(row):
+    """The exported cell values of one SalaryRow, in EXPORT_COLUMNS order."""
+    values = []
+    for _, attr, zero_if_none in EXPORT_COLUMNS:
+        value = getattr(row, attr)
+        values.append((value or 0) if zero_if_none else value)
+    return values
+
+
+def write_salary_xlsx(rows, output, sheet_name="Salary Overview"):
+    """
+    Write rows to an .xlsx workbook at `output` (a path or binary file object)
+    using xlsxwriter's constant_memory mode, which flushes each row to disk as
+    soon as the next one starts. Memory use does not grow with the row count.
+
+    Returns the number of data rows written.
+    """
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet(sheet_name)
+    header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+
+    worksheet.write_row(0, 0, [header for header, _, _ in EXPORT_COLUMNS], header_format)
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        worksheet.write_row(count, 0, export_values(row))
+
+    workbook.close()
+    return count
+
+
+# ============================================================
+# STREAMING CSV / NDJSON
+# ============================================================
+# Flat feeds carry the period too, since unfiltered exports span many months
+FEED_FIELDS = ["year", "month"] + [attr for _, attr, _ in EXPORT_COLUMNS]
+
+# Buffer this many bytes before yielding a chunk to the response
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _feed_values(row):
+    return [row.year, row.month] + export_values(row)
+
+
+def iter_csv(rows):
+    """Yield UTF-8 CSV in ~64 KB chunks; the header goes out on its own first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Year", "Month"] + [header for header, _, _ in EXPORT_COLUMNS])
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(_feed_values(row))
+        if buffer.tell() >= STREAM_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(rows):
+    """Yield one JSON object per line, in ~64 KB chunks."""
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(FEED_FIELDS, _feed_values(row))), separators=(",", ":")) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= STREAM_CHUNK_BYTES:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip-compress a byte stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
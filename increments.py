@@ -0,0 +1,90 @@
+# increments.py
+"""
+Base-pay increments for a whole group of staff (department, designation or
+category), applied with one UPDATE and logged with one bulk insert.
+"""
+from sqlalchemy import func, insert, update
+
+from models import db, Staff, IncrementHistory
+from arrears import compute_arrears
+from recompute import mark_staff_dirty
+from salary_history import record_increment_versions
+
+# scope -> Staff column the group is matched on
+GROUP_SCOPES = {
+    "department": Staff.department,
+    "designation": Staff.designation,
+    "category": Staff.category,
+}
+MODES = ("flat", "percentage")
+
+
+def _group_condition(scope, target):
+    if scope not in GROUP_SCOPES:
+        raise ValueError(f"Unknown increment scope: {scope}")
+    return (GROUP_SCOPES[scope] == target) & Staff.active.is_(True)
+
+
+def _increased(amount, mode, value):
+    """SQL expression for `amount` (a salary column) after the increment."""
+    if mode == "flat":
+        return amount + value
+    if mode == "percentage":
+        return func.round(amount * (1 + value / 100.0), 2)
+    raise ValueError(f"Unknown increment mode: {mode}")
+
+
+def preview_group_increment(scope, target, mode, value):
+    """
+    Headcount and monthly base-pay cost of the increment, computed in one
+    aggregate query without changing anything.
+    """
+    headcount, current_total, new_total = db.session.query(
+        func.count(Staff.id),
+        func.coalesce(func.sum(Staff.base_salary), 0),
+        func.coalesce(func.sum(_increased(Staff.base_salary, mode, value)), 0),
+    ).filter(_group_condition(scope, target)).one()
+    return {
+        "scope": scope,
+        "target": target,
+        "mode": mode,
+        "value": value,
+        "headcount": headcount,
+        "current_total": float(current_total),
+        "new_total": float(new_total),
+        "monthly_increase": float(new_total) - float(current_total),
+        "annual_increase": (float(new_total) - float(current_total)) * 12,
+    }
+
+
+def apply_group_increment(scope, target, mode, value, effective_month):
+    """
+    Raise base_salary for every active staff member in the group with a single
+    UPDATE and write one IncrementHistory row per staff member in one bulk
+    insert. The salary history gets a version from the effective month, so
+    payroll for earlier months keeps the old amount, and months already paid
+    since then get arrears. Returns the preview figures for what was applied
+    plus the arrears summary under "arrears". The caller commits.
+    """
+    summary = preview_group_increment(scope, target, mode, value)
+    condition = _group_condition(scope, target)
+
+    names = [name for (name,) in db.session.query(Staff.name).filter(condition)]
+    record_increment_versions(condition, effective_month,
+                              lambda amount: _increased(amount, mode, value))
+    db.session.execute(
+        update(Staff).where(condition).values(base_salary=_increased(Staff.base_salary, mode, value))
+        .execution_options(synchronize_session=False)
+    )
+    if names:
+        db.session.execute(insert(IncrementHistory), [{
+            "increment_type": f"{scope.title()} Increment",
+            "target": name,
+            "mode": mode.title(),
+            "value": value,
+            "effective_month": effective_month,
+        } for name in names])
+    # Set-based UPDATE bypasses the ORM event, so mark open records here
+    mark_staff_dirty(condition, "base_salary")
+    summary["arrears"] = compute_arrears(condition, effective_month)
+    return summary
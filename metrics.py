@@ -0,0 +1,173 @@
+# metrics.py
+"""
+Per-request latency and SQL instrumentation for the routes blueprint.
+
+SQLAlchemy engine events count every statement a request executes and the
+time spent in the database; blueprint before/after_request hooks time the
+request itself. Figures are kept in an in-process registry per endpoint:
+
+- payroll_request_duration_seconds  latency histogram
+- payroll_request_queries_total     SQL statements executed
+- payroll_request_db_seconds_total  time spent executing them
+- payroll_requests_total            requests by status code
+
+and served in Prometheus text format by the /metrics route. Each worker
+process has its own registry, so scrape every worker (or run one). Requests
+slower than SLOW_REQUEST_THRESHOLD seconds are logged with their query
+count and DB time.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class EndpointStats:
+    """Latency histogram and SQL totals for one endpoint."""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statuses = defaultdict(int)
+
+    def observe(self, seconds, queries, db_seconds, status):
+        self.count += 1
+        self.latency_sum += seconds
+        self.queries += queries
+        self.db_seconds += db_seconds
+        self.statuses[status] += 1
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+_lock = threading.Lock()
+_stats = defaultdict(EndpointStats)
+
+
+def reset_metrics():
+    with _lock:
+        _stats.clear()
+
+
+# -------------------------
+# SQL statement accounting
+# -------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    starts = conn.info.get('query_start')
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    g.sql_queries = g.get('sql_queries', 0) + 1
+    g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+    for listener in g.get('sql_listeners', ()):
+        listener(statement, elapsed)
+
+
+def add_query_listener(listener):
+    """Call listener(statement, seconds) for every SQL statement of the current request."""
+    g.sql_listeners = g.get('sql_listeners', ()) + (listener,)
+
+
+def remove_query_listener(listener):
+    g.sql_listeners = tuple(l for l in g.get('sql_listeners', ()) if l is not listener)
+
+
+def query_count():
+    """Statements executed so far by the current request."""
+    return g.get('sql_queries', 0)
+
+
+# -------------------------
+# Request hooks
+# -------------------------
+def start_request_timer():
+    if not current_app.config.get('METRICS_ENABLED', True):
+        return
+    g.request_started = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+
+
+def record_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    endpoint = request.endpoint or 'unknown'
+    queries, db_seconds = g.get('sql_queries', 0), g.get('sql_seconds', 0.0)
+    with _lock:
+        _stats[endpoint].observe(seconds, queries, db_seconds, response.status_code)
+
+    threshold = current_app.config.get('SLOW_REQUEST_THRESHOLD')
+    if threshold is not None and seconds >= threshold:
+        logger.warning("Slow request %s %s (%s): %.3fs, %d queries, %.3fs in DB",
+                       request.method, request.path, endpoint, seconds, queries, db_seconds)
+    return response
+
+
+# -------------------------
+# Prometheus text exposition
+# -------------------------
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics():
+    """All endpoint figures in Prometheus text format (version 0.0.4)."""
+    with _lock:
+        snapshot = sorted(_stats.items())
+        lines = [
+            "# HELP payroll_request_duration_seconds Request latency by endpoint.",
+            "# TYPE payroll_request_duration_seconds histogram",
+        ]
+        for endpoint, s in snapshot:
+            ep = _label(endpoint)
+            for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                lines.append(f'payroll_request_duration_seconds_bucket{{endpoint="{ep}",le="{bound}"}} {count}')
+            lines.append(f'payroll_request_duration_seconds_bucket{{endpoint="{ep}",le="+Inf"}} {s.count}')
+            lines.append(f'payroll_request_duration_seconds_sum{{endpoint="{ep}"}} {s.latency_sum:.6f}')
+            lines.append(f'payroll_request_duration_seconds_count{{endpoint="{ep}"}} {s.count}')
+
+        lines += ["# HELP payroll_request_queries_total SQL statements executed by endpoint.",
+                  "# TYPE payroll_request_queries_total counter"]
+        lines += [f'payroll_request_queries_total{{endpoint="{_label(ep)}"}} {s.queries}' for ep, s in snapshot]
+
+        lines += ["# HELP payroll_request_db_seconds_total Time spent executing SQL by endpoint.",
+                  "# TYPE payroll_request_db_seconds_total counter"]
+        lines += [f'payroll_request_db_seconds_total{{endpoint="{_label(ep)}"}} {s.db_seconds:.6f}'
+                  for ep, s in snapshot]
+
+        lines += ["# HELP payroll_requests_total Requests by endpoint and status code.",
+                  "# TYPE payroll_requests_total counter"]
+        for endpoint, s in snapshot:
+            for status, count in sorted(s.statuses.items()):
+                lines.append(f'payroll_requests_total{{endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app):
+    """Count SQL statements on the app's engines (the request hooks live on the routes blueprint)."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
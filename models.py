@@ -2,9 +2,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+from database import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 # ============================================================
@@ -81,6 +84,66 @@ def ensure_admin_exists(app):
             print(f"⚠️ Skipped duplicate user creation: {e}")
 
 
+# ============================================================
+# INDEX CREATION HELPER
+# ============================================================
+def _dedupe_salary_records():
+    """
+    Delete duplicate (staff_id, year, month) SalaryRecords left by concurrent
+    saves before the unique index existed. Per key the finalized row
+    (net_salary > 0) is kept, newest first. Returns the number deleted.
+    """
+    duplicates = db.session.query(SalaryRecord.staff_id, SalaryRecord.year, SalaryRecord.month) \
+        .group_by(SalaryRecord.staff_id, SalaryRecord.year, SalaryRecord.month) \
+        .having(db.func.count(SalaryRecord.id) > 1).all()
+    doomed = []
+    for staff_id, year, month in duplicates:
+        ids = [record_id for (record_id,) in db.session.query(SalaryRecord.id)
+               .filter_by(staff_id=staff_id, year=year, month=month)
+               .order_by((SalaryRecord.net_salary > 0).desc(), SalaryRecord.id.desc())]
+        doomed.extend(ids[1:])
+    for start in range(0, len(doomed), 1000):
+        SalaryRecord.query.filter(SalaryRecord.id.in_(doomed[start:start + 1000])) \
+            .delete(synchronize_session=False)
+    db.session.commit()
+    return len(doomed)
+
+
+# Unique indexes whose existing rows may need cleaning before they can be created
+_INDEX_DEDUPERS = {
+    'ux_salary_records_staff_period': _dedupe_salary_records,
+}
+
+
+def ensure_indexes(app):
+    """
+    Create indexes declared on the models that are missing from existing tables.
+    db.create_all() skips tables that already exist, so indexes added later
+    would otherwise never reach databases created before them.
+
+    Duplicate rows blocking a unique index are removed first; if a unique
+    index still can't be created, startup stops, because the upserts in
+    records.py rely on it.
+    """
+    with app.app_context():
+        for table in db.metadata.sorted_tables:
+            existing = {ix['name'] for ix in db.inspect(db.engine).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                dedupe = _INDEX_DEDUPERS.get(index.name)
+                if dedupe:
+                    removed = dedupe()
+                    if removed:
+                        print(f"✅ Removed {removed} duplicate row(s) from {table.name} before creating {index.name}")
+                try:
+                    index.create(bind=db.engine, checkfirst=True)
+                except Exception as e:
+                    if index.unique:
+                        raise RuntimeError(f"Could not create unique index {index.name} on {table.name}: {e}") from e
+                    print(f"⚠️ Could not create index {index.name}: {e}")
+
+
 # ============================================================
 # STAFF MODEL
 # ============================================================
@@ -115,11 +178,91 @@ class Staff(db.Model):
         return f"<Staff {self.staff_id} - {self.name}>"
 
 
+# ============================================================
+# ID SEQUENCE MODEL
+# ============================================================
+class IdSequence(db.Model):
+    """Named counters handed out atomically (e.g. the next staff_id)."""
+    __tablename__ = 'id_sequences'
+
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<IdSequence {self.name}={self.next_value}>"
+
+
+STAFF_ID_SEQUENCE = 'staff_id'
+FIRST_STAFF_ID = 1001
+
+
+def _seed_staff_sequence():
+    """Create the staff_id sequence row, continuing after the highest existing staff_id."""
+    last = db.session.query(db.func.max(Staff.staff_id)).scalar()
+    try:
+        with db.session.begin_nested():
+            db.session.add(IdSequence(name=STAFF_ID_SEQUENCE,
+                                      next_value=(last + 1) if last else FIRST_STAFF_ID))
+    except IntegrityError:
+        pass  # another request seeded it first
+
+
+def allocate_staff_ids(count=1):
+    """
+    Atomically reserve `count` consecutive staff_ids and return the first one.
+
+    The UPDATE takes a row lock on the sequence that other allocators wait on
+    until the caller commits, so concurrent saves always get distinct IDs.
+    IDs of a rolled-back transaction are returned to the sequence with it.
+    """
+    seq = IdSequence.__table__
+    bump = seq.update().where(seq.c.name == STAFF_ID_SEQUENCE) \
+        .values(next_value=seq.c.next_value + count)
+    if db.session.execute(bump).rowcount == 0:
+        _seed_staff_sequence()
+        db.session.execute(bump)
+    next_value = db.session.query(IdSequence.next_value) \
+        .filter(IdSequence.name == STAFF_ID_SEQUENCE).scalar()
+    return next_value - count
+
+
+def peek_next_staff_id():
+    """The staff_id the next allocation would return (primary-key lookup, no staff scan)."""
+    next_value = db.session.query(IdSequence.next_value) \
+        .filter(IdSequence.name == STAFF_ID_SEQUENCE).scalar()
+    if next_value is None:
+        last = db.session.query(db.func.max(Staff.staff_id)).scalar()
+        return (last + 1) if last else FIRST_STAFF_ID
+    return next_value
+
+
+def ensure_sequences(app):
+    """
+    Seed the staff_id sequence on startup so requests never need to, and move
+    it past any staff_id that was written without going through it.
+    """
+    with app.app_context():
+        sequence = db.session.get(IdSequence, STAFF_ID_SEQUENCE)
+        if sequence is None:
+            _seed_staff_sequence()
+        else:
+            last = db.session.query(db.func.max(Staff.staff_id)).scalar()
+            if last and last >= sequence.next_value:
+                sequence.next_value = last + 1
+        db.session.commit()
+
+
 # ============================================================
 # SALARY RECORD MODEL
 # ============================================================
 class SalaryRecord(db.Model):
     __tablename__ = 'salary_records'
+    __table_args__ = (
+        # One record per staff member per month; also serves (staff_id, month, year) lookups
+        db.Index('ux_salary_records_staff_period', 'staff_id', 'year', 'month', unique=True),
+        # Reporting filters (salary_overview / exports)
+        db.Index('ix_salary_records_period', 'year', 'month'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), nullable=False)
@@ -154,6 +297,104 @@ class SalaryRecord(db.Model):
         return f"<SalaryRecord StaffID={self.staff_id} {self.month}/{self.year}>"
 
 
+# Per-head deduction columns stored on SalaryRecord (same set the D&R page saves)
+DEDUCTION_COLUMNS = ["it", "loan", "advance", "uniform", "cd", "hostel", "suspense", "misc"]
+
+
+# ============================================================
+# SALARY PERIOD VERSION MODEL
+# ============================================================
+class SalaryPeriodVersion(db.Model):
+    """Counter bumped on every SalaryRecord write for a month; used as a cache key."""
+    __tablename__ = 'salary_period_versions'
+
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f"<SalaryPeriodVersion {self.month}/{self.year} v{self.version}>"
+
+
+class DataVersion(db.Model):
+    """Named counter bumped with writes to a small cached table (e.g. the PT slabs)."""
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f"<DataVersion {self.name} v{self.version}>"
+
+
+def bump_data_version(name, connection=None):
+    """
+    Increment the named DataVersion (creating it at 1) in the caller's
+    transaction; pass `connection` from inside mapper events.
+    """
+    conn = connection if connection is not None else db.session.connection()
+    table = DataVersion.__table__
+    bump = table.update().where(table.c.name == name) \
+        .values(version=table.c.version + 1, updated_at=db.func.now())
+    if conn.execute(bump).rowcount == 0:
+        try:
+            with conn.begin_nested():
+                conn.execute(table.insert().values(name=name, version=1))
+        except IntegrityError:
+            conn.execute(bump)  # another transaction created it first
+
+
+def get_data_version(name):
+    """Current value of the named DataVersion (0 if it was never bumped)."""
+    return db.session.query(DataVersion.version).filter(DataVersion.name == name).scalar() or 0
+
+
+# ============================================================
+# PAYROLL SUMMARY MODEL
+# ============================================================
+class PayrollSummary(db.Model):
+    """
+    Completed-salary totals per (year, month, department), kept up to date by
+    records.upsert_salary_records so the dashboard never scans salary_records.
+    """
+    __tablename__ = 'payroll_summary'
+
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    department = db.Column(db.String(80), primary_key=True)
+
+    headcount = db.Column(db.Integer, nullable=False, default=0)
+    gross = db.Column(db.Float, nullable=False, default=0)
+    epf = db.Column(db.Float, nullable=False, default=0)
+    esi = db.Column(db.Float, nullable=False, default=0)
+    pt = db.Column(db.Float, nullable=False, default=0)
+    total_deductions = db.Column(db.Float, nullable=False, default=0)
+    net = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f"<PayrollSummary {self.month}/{self.year} {self.department}>"
+
+
+# ============================================================
+# STALE SALARY RECORD MODEL
+# ============================================================
+class StaleSalaryRecord(db.Model):
+    """A finalized SalaryRecord whose inputs changed since it was computed (see recompute.py)."""
+    __tablename__ = 'stale_salary_records'
+
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), primary_key=True, autoincrement=False)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    reason = db.Column(db.String(30), nullable=False)
+    marked_at = db.Column(db.DateTime, default=db.func.now())
+
+    def __repr__(self):
+        return f"<StaleSalaryRecord StaffID={self.staff_id} {self.month}/{self.year} ({self.reason})>"
+
+
 # ============================================================
 # INCREMENT HISTORY MODEL
 # ============================================================
@@ -172,6 +413,59 @@ class IncrementHistory(db.Model):
         return f"<Increment {self.increment_type} on {self.target}>"
 
 
+# ============================================================
+# SALARY VERSION MODEL
+# ============================================================
+class SalaryVersion(db.Model):
+    """Base salary of a staff member from effective_from (first of a month) onward."""
+    __tablename__ = 'salary_versions'
+    __table_args__ = (
+        # "Salary as of month M": latest effective_from <= M per staff member
+        db.Index('ux_salary_versions_staff_effective', 'staff_id', 'effective_from', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    effective_from = db.Column(db.Date, nullable=False)
+    date_created = db.Column(db.DateTime, default=db.func.now())
+
+    def __repr__(self):
+        return f"<SalaryVersion StaffID={self.staff_id} {self.effective_from}: ₹{self.amount}>"
+
+
+# ============================================================
+# ARREARS LINE MODEL
+# ============================================================
+class ArrearsLine(db.Model):
+    """Net pay owed for an already-paid month (year/month), paid with a later payroll."""
+    __tablename__ = 'arrears_lines'
+    __table_args__ = (
+        db.Index('ix_arrears_lines_payout', 'payout_year', 'payout_month', 'staff_id'),
+        db.Index('ix_arrears_lines_staff_period', 'staff_id', 'year', 'month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), nullable=False)
+
+    # Month the arrears are for
+    month = db.Column(db.Integer, nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+
+    # Payroll they are paid with
+    payout_month = db.Column(db.Integer, nullable=False)
+    payout_year = db.Column(db.Integer, nullable=False)
+
+    old_net = db.Column(db.Float, default=0)
+    new_net = db.Column(db.Float, default=0)
+    amount = db.Column(db.Float, nullable=False)
+    settled = db.Column(db.Boolean, default=False)
+    date_created = db.Column(db.DateTime, default=db.func.now())
+
+    def __repr__(self):
+        return f"<ArrearsLine StaffID={self.staff_id} {self.month}/{self.year}: ₹{self.amount}>"
+
+
 # ============================================================
 # PROFESSIONAL TAX MODEL
 # ============================================================
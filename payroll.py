@@ -0,0 +1,114 @@
+# payroll.py
+"""
+Month-end payroll run: finalizes the SalaryRecord of every active staff member
+for one month using a handful of set-based queries and a single transaction.
+"""
+import time
+
+from models import db, Staff, SalaryRecord, DEDUCTION_COLUMNS
+from pt_slabs import PT_MONTHS, get_slab_index
+from arrears import arrears_due, settle_arrears
+from records import upsert_salary_records
+from salary_history import salaries_as_of
+from utils import calculate_salary_components_batch
+
+
+def run_payroll(month, year, overwrite=False, staff_ids=None):
+    """
+    Compute and save the final SalaryRecord for every active staff member.
+
+    Base salaries are the ones in force for that month (salary history), so
+    re-running a past month uses that month's pay. Draft records (saved from
+    the LOP page) supply lop_days and any deduction
+    or reimbursement values already on them. Records that are already
+    finalized (net_salary > 0) are skipped unless `overwrite` is set.
+    Arrears due with this month that no saved record includes yet are added
+    to reimbursements and marked settled.
+
+    `staff_ids` (Staff.id values) limits the run to those staff members.
+
+    Returns a dict with created/updated/skipped counts and elapsed seconds.
+    """
+    started = time.perf_counter()
+
+    staff_query = db.session.query(
+        Staff.id, Staff.allowances, Staff.epf_eligible, Staff.esi_eligible
+    ).filter(Staff.active.is_(True))
+    if staff_ids is not None:
+        staff_query = staff_query.filter(Staff.id.in_(staff_ids))
+    staff_rows = staff_query.all()
+    base_salaries = salaries_as_of(month, year, staff_ids)
+
+    record_query = db.session.query(
+        SalaryRecord.id, SalaryRecord.staff_id, SalaryRecord.lop_days,
+        SalaryRecord.net_salary, SalaryRecord.total_reimbursements,
+        *[getattr(SalaryRecord, c) for c in DEDUCTION_COLUMNS]
+    ).filter(SalaryRecord.month == month, SalaryRecord.year == year)
+    if staff_ids is not None:
+        record_query = record_query.filter(SalaryRecord.staff_id.in_(staff_ids))
+    existing = {r.staff_id: r for r in record_query}
+    slab_index = get_slab_index() if month in PT_MONTHS else None
+
+    targets, skipped = [], 0
+    for s in staff_rows:
+        record = existing.get(s.id)
+        if record is not None and (record.net_salary or 0) > 0 and not overwrite:
+            skipped += 1
+            continue
+        targets.append((s, record))
+
+    if not targets:
+        return {"created": 0, "updated": 0, "skipped": skipped,
+                "elapsed": time.perf_counter() - started}
+
+    arrears = arrears_due(month, year, staff_ids, unsettled_only=True)
+    deductions = {
+        c: [(getattr(r, c) or 0) if r is not None else 0 for _, r in targets]
+        for c in DEDUCTION_COLUMNS
+    }
+    deductions["professional_tax"] = [
+        slab_index.tax_for(base_salaries[s.id]) if slab_index else 0 for s, _ in targets
+    ]
+
+    result = calculate_salary_components_batch(
+        gross_salary=[base_salaries[s.id] + (s.allowances or 0) for s, _ in targets],
+        lop_days=[(r.lop_days or 0) if r is not None else 0 for _, r in targets],
+        deductions=deductions,
+        reimbursements=[((r.total_reimbursements or 0) if r is not None else 0) + arrears.get(s.id, 0)
+                        for s, r in targets],
+        month=month,
+        year=year,
+        epf_eligible=[bool(s.epf_eligible) for s, _ in targets],
+        esi_eligible=[bool(s.esi_eligible) for s, _ in targets],
+    )
+
+    rows, created = [], 0
+    for i, (s, record) in enumerate(targets):
+        row = {
+            "staff_id": s.id,
+            "month": month,
+            "year": year,
+            "gross_salary": float(result["adjusted_gross"][i]),
+            "lop_days": float(result["lop_days"][i]),
+            "lop_amount": float(result["lop_amount"][i]),
+            "epf": float(result["epf"][i]),
+            "esi": float(result["esi"][i]),
+            "total_deductions": float(result["total_deductions"][i]),
+            "total_reimbursements": float(result["total_reimbursements"][i]),
+            "net_salary": float(result["net_salary"][i]),
+        }
+        for c in DEDUCTION_COLUMNS:
+            row[c] = float(deductions[c][i])
+        rows.append(row)
+        created += record is None
+
+    try:
+        upsert_salary_records(rows)
+        settle_arrears(month, year, [row["staff_id"] for row in rows])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"created": created, "updated": len(rows) - created, "skipped": skipped,
+            "elapsed": time.perf_counter() - started}
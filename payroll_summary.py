@@ -0,0 +1,186 @@
+# payroll_summary.py
+"""
+Materialized monthly payroll totals per department (the payroll_summary table).
+
+Only completed records (net_salary > 0) are counted, as in the salary reports.
+Whenever SalaryRecords are written, records.upsert_salary_records reads the
+written records' contributions before and after the write (with a locking
+read, so the figures are the latest committed ones, not a stale snapshot)
+and adds the difference to their (year, month, department) groups with an
+atomic `col = col + delta` upsert. Concurrent saves in the same group each
+add their own delta instead of overwriting one another's re-aggregation.
+rebuild_payroll_summary()
+recomputes the whole table (e.g. after staff change department), and
+ensure_payroll_summary() does so on startup when the table is still empty
+but completed records exist. Dashboard reads only this table, so it costs
+O(departments) rather than O(records).
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, tuple_
+
+from models import db, Staff, SalaryRecord, PayrollSummary, DEDUCTION_COLUMNS
+
+TREND_MONTHS = 6
+CONTRIBUTION_CHUNK = 1000  # record keys per contribution query
+SUMMARY_FIELDS = ("headcount", "gross", "epf", "esi", "pt", "total_deductions", "net")
+
+
+def _aggregate_query():
+    manual = sum(func.coalesce(getattr(SalaryRecord, c), 0) for c in DEDUCTION_COLUMNS)
+    epf = func.coalesce(SalaryRecord.epf, 0)
+    esi = func.coalesce(SalaryRecord.esi, 0)
+    deductions = func.coalesce(SalaryRecord.total_deductions, 0)
+    return db.session.query(
+        SalaryRecord.year, SalaryRecord.month, Staff.department,
+        func.count(SalaryRecord.id),
+        func.sum(SalaryRecord.gross_salary),
+        func.sum(epf),
+        func.sum(esi),
+        # PT is folded into total_deductions rather than stored in its own column
+        func.sum(deductions - epf - esi - manual),
+        func.sum(deductions),
+        func.sum(SalaryRecord.net_salary),
+    ).join(Staff, SalaryRecord.staff_id == Staff.id) \
+        .filter(SalaryRecord.net_salary > 0) \
+        .group_by(SalaryRecord.year, SalaryRecord.month, Staff.department)
+
+
+def _summary_rows(query):
+    now = datetime.utcnow()
+    return [{
+        "year": year, "month": month, "department": department,
+        "headcount": headcount, "gross": round(gross or 0, 2), "epf": round(epf or 0, 2),
+        "esi": round(esi or 0, 2), "pt": round(pt or 0, 2),
+        "total_deductions": round(deductions or 0, 2), "net": round(net or 0, 2),
+        "updated_at": now,
+    } for year, month, department, headcount, gross, epf, esi, pt, deductions, net in query]
+
+
+def summary_contributions(keys):
+    """
+    {(year, month, department): [headcount, gross, epf, esi, pt, deductions, net]}
+    summed over the completed records among `keys` [(staff_id, year, month)].
+    The records are read FOR UPDATE, so concurrent writers of the same
+    records queue up and each sees the other's committed values.
+    """
+    totals = defaultdict(lambda: [0] * len(SUMMARY_FIELDS))
+    keys = list(keys)
+    record_key = tuple_(SalaryRecord.staff_id, SalaryRecord.year, SalaryRecord.month)
+    columns = [SalaryRecord.year, SalaryRecord.month, Staff.department, SalaryRecord.gross_salary,
+               SalaryRecord.epf, SalaryRecord.esi, SalaryRecord.total_deductions, SalaryRecord.net_salary,
+               *[getattr(SalaryRecord, c) for c in DEDUCTION_COLUMNS]]
+    for start in range(0, len(keys), CONTRIBUTION_CHUNK):
+        # Per-record rows rather than GROUP BY: PostgreSQL refuses FOR UPDATE on aggregates
+        query = db.session.query(*columns).join(Staff, SalaryRecord.staff_id == Staff.id) \
+            .filter(record_key.in_(keys[start:start + CONTRIBUTION_CHUNK]), SalaryRecord.net_salary > 0) \
+            .with_for_update(of=SalaryRecord)
+        for year, month, department, gross, epf, esi, deductions, net, *manual in query:
+            epf, esi, deductions = epf or 0, esi or 0, deductions or 0
+            pt = deductions - epf - esi - sum(m or 0 for m in manual)
+            group = totals[(year, month, department)]
+            for i, value in enumerate((1, gross or 0, epf, esi, pt, deductions, net or 0)):
+                group[i] += value
+    return totals
+
+
+def apply_summary_delta(before, after):
+    """
+    Add after - before (two summary_contributions() results) to the summary
+    groups with an atomic `col = col + delta` upsert. The caller commits.
+    """
+    from records import _insert_for
+
+    now = datetime.utcnow()
+    rows = []
+    for group in sorted(set(before) | set(after)):
+        old, new = before.get(group, [0] * len(SUMMARY_FIELDS)), after.get(group, [0] * len(SUMMARY_FIELDS))
+        delta = [n - o for n, o in zip(new, old)]
+        if any(delta):
+            year, month, department = group
+            rows.append(dict(zip(SUMMARY_FIELDS, delta), year=year, month=month,
+                             department=department, updated_at=now))
+    if not rows:
+        return
+
+    table = PayrollSummary.__table__
+    dialect_name = db.session.get_bind().dialect.name
+    insert = _insert_for(dialect_name)
+    if insert is None:
+        for row in rows:
+            entry = db.session.get(PayrollSummary, (row["year"], row["month"], row["department"]))
+            if entry is None:
+                entry = PayrollSummary(year=row["year"], month=row["month"], department=row["department"],
+                                       **{f: 0 for f in SUMMARY_FIELDS})
+                db.session.add(entry)
+            for f in SUMMARY_FIELDS:
+                setattr(entry, f, round(getattr(entry, f) + row[f], 2))
+            entry.updated_at = now
+        db.session.flush()
+    else:
+        stmt = insert(table)
+        incoming = stmt.inserted if dialect_name == "mysql" else stmt.excluded
+        changes = {f: table.c[f] + incoming[f] if f == "headcount" else func.round(table.c[f] + incoming[f], 2)
+                   for f in SUMMARY_FIELDS}
+        changes["updated_at"] = now
+        if dialect_name == "mysql":
+            stmt = stmt.on_duplicate_key_update(changes)
+        else:
+            stmt = stmt.on_conflict_do_update(index_elements=["year", "month", "department"], set_=changes)
+        db.session.execute(stmt, rows)
+
+    # Groups whose last completed record went away
+    key = tuple_(PayrollSummary.year, PayrollSummary.month, PayrollSummary.department)
+    db.session.execute(delete(PayrollSummary).where(
+        key.in_([(r["year"], r["month"], r["department"]) for r in rows]), PayrollSummary.headcount <= 0))
+
+
+def rebuild_payroll_summary():
+    """Recompute every summary row from salary_records. The caller commits."""
+    db.session.execute(delete(PayrollSummary))
+    rows = _summary_rows(_aggregate_query())
+    if rows:
+        db.session.execute(insert(PayrollSummary), rows)
+    return len(rows)
+
+
+def ensure_payroll_summary(app):
+    """Backfill payroll_summary for databases that had records before the table existed."""
+    with app.app_context():
+        if db.session.query(PayrollSummary.year).first() is not None:
+            return
+        if db.session.query(SalaryRecord.id).filter(SalaryRecord.net_salary > 0).first() is None:
+            return
+        groups = rebuild_payroll_summary()
+        db.session.commit()
+        print(f"✅ Built payroll summary for {groups} month/department group(s)")
+
+
+def latest_summary_period():
+    """(year, month) of the most recent month with completed records, or None."""
+    row = db.session.query(PayrollSummary.year, PayrollSummary.month) \
+        .order_by(PayrollSummary.year.desc(), PayrollSummary.month.desc()).first()
+    return tuple(row) if row else None
+
+
+def get_month_summary(month, year):
+    """Department rows and their total for one month, read from payroll_summary only."""
+    departments = PayrollSummary.query.filter_by(year=year, month=month) \
+        .order_by(PayrollSummary.department).all()
+    total = defaultdict(float)
+    for row in departments:
+        for field in ("headcount", "gross", "epf", "esi", "pt", "total_deductions", "net"):
+            total[field] += getattr(row, field)
+    return departments, dict(total)
+
+
+def get_monthly_trend(months=TREND_MONTHS):
+    """[(year, month, headcount, gross, net)] for the latest `months` months, oldest first."""
+    rows = db.session.query(
+        PayrollSummary.year, PayrollSummary.month,
+        func.sum(PayrollSummary.headcount), func.sum(PayrollSummary.gross), func.sum(PayrollSummary.net),
+    ).group_by(PayrollSummary.year, PayrollSummary.month) \
+        .order_by(PayrollSummary.year.desc(), PayrollSummary.month.desc()) \
+        .limit(months).all()
+    return list(reversed(rows))
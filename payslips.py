@@ -0,0 +1,153 @@
+# payslips.py
+"""
+Per-employee payslip PDFs built from SalaryRecord + Staff.
+
+Payslip data is loaded as plain dicts so a month's payslips can be written
+into a ZIP either serially (the /payslips download) or in parallel across CPU
+cores with a process pool (the `export-payslips` CLI command and benchmarks,
+never inside a web worker).
+"""
+import calendar
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from fpdf import FPDF
+
+from models import db, Staff, SalaryRecord
+
+# (label, SalaryRecord column) for the per-head deductions
+DEDUCTION_LINES = [
+    ("Income Tax", "it"),
+    ("Loan", "loan"),
+    ("Advance", "advance"),
+    ("Uniform", "uniform"),
+    ("CD", "cd"),
+    ("Hostel", "hostel"),
+    ("Suspense", "suspense"),
+    ("Misc", "misc"),
+]
+
+_PAYSLIP_COLUMNS = [
+    SalaryRecord.id, SalaryRecord.month, SalaryRecord.year,
+    Staff.staff_id, Staff.name, Staff.department, Staff.designation,
+    Staff.bank_account, Staff.pf_number, Staff.esi_number,
+    SalaryRecord.gross_salary, SalaryRecord.lop_days, SalaryRecord.lop_amount,
+    SalaryRecord.epf, SalaryRecord.esi,
+    *[getattr(SalaryRecord, column) for _, column in DEDUCTION_LINES],
+    SalaryRecord.total_deductions, SalaryRecord.total_reimbursements, SalaryRecord.net_salary,
+]
+
+
+def _to_payslip(row):
+    data = {column.key: value for column, value in zip(_PAYSLIP_COLUMNS, row)}
+    for key in ("gross_salary", "lop_days", "lop_amount", "epf", "esi",
+                "total_deductions", "total_reimbursements", "net_salary",
+                *[column for _, column in DEDUCTION_LINES]):
+        data[key] = data[key] or 0
+    # PT is folded into total_deductions rather than stored in its own column
+    manual = sum(data[column] for _, column in DEDUCTION_LINES)
+    data["professional_tax"] = round(data["total_deductions"] - data["epf"] - data["esi"] - manual, 2)
+    return data
+
+
+def get_payslip_data(month=None, year=None, record_id=None):
+    """Completed records (net_salary > 0) as picklable payslip dicts."""
+    query = db.session.query(*_PAYSLIP_COLUMNS) \
+        .join(Staff, SalaryRecord.staff_id == Staff.id) \
+        .filter(SalaryRecord.net_salary > 0)
+    if record_id:
+        query = query.filter(SalaryRecord.id == record_id)
+    if month:
+        query = query.filter(SalaryRecord.month == month)
+    if year:
+        query = query.filter(SalaryRecord.year == year)
+    query = query.order_by(SalaryRecord.year, SalaryRecord.month, Staff.staff_id)
+    return [_to_payslip(row) for row in query]
+
+
+def payslip_filename(data):
+    return f"Payslip_{data['staff_id']}_{data['year']}_{data['month']:02d}.pdf"
+
+
+def _line(pdf, label, amount, bold=False):
+    pdf.set_font('Arial', 'B' if bold else '', 10)
+    pdf.cell(120, 7, label, border='B')
+    pdf.cell(60, 7, f"{amount:,.2f}", border='B', align='R')
+    pdf.ln()
+
+
+def render_payslip(data):
+    """Render one payslip dict (see get_payslip_data) into PDF bytes."""
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+    pdf.set_margins(15, 15, 15)
+
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, 'Madha Engineering College', 0, 1, 'C')
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 8, f"Payslip for {calendar.month_name[data['month']]} {data['year']}", 0, 1, 'C')
+    pdf.ln(4)
+
+    pdf.set_font('Arial', '', 10)
+    details = [
+        ("Staff ID", data['staff_id']), ("Name", data['name']),
+        ("Department", data['department']), ("Designation", data['designation']),
+        ("Bank Account", data['bank_account']), ("PF Number", data['pf_number'] or '-'),
+        ("ESI Number", data['esi_number'] or '-'), ("LOP Days", data['lop_days']),
+    ]
+    for i in range(0, len(details), 2):
+        for label, value in details[i:i + 2]:
+            pdf.cell(30, 7, f"{label}:")
+            pdf.cell(60, 7, str(value)[:35])
+        pdf.ln()
+    pdf.ln(4)
+
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 8, 'Earnings', 0, 1)
+    _line(pdf, 'Gross Salary', data['gross_salary'] + data['lop_amount'])
+    _line(pdf, f"Loss of Pay ({data['lop_days']} day(s))", -data['lop_amount'])
+    _line(pdf, 'Reimbursements', data['total_reimbursements'])
+    pdf.ln(4)
+
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 8, 'Deductions', 0, 1)
+    _line(pdf, 'EPF', data['epf'])
+    _line(pdf, 'ESI', data['esi'])
+    if data['professional_tax']:
+        _line(pdf, 'Professional Tax', data['professional_tax'])
+    for label, column in DEDUCTION_LINES:
+        if data[column]:
+            _line(pdf, label, data[column])
+    _line(pdf, 'Total Deductions', data['total_deductions'], bold=True)
+    pdf.ln(6)
+
+    _line(pdf, 'Net Salary (Rs.)', data['net_salary'], bold=True)
+
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def _render_named(data):
+    return payslip_filename(data), render_payslip(data)
+
+
+def write_payslips_zip(payslips, output, workers=1):
+    """
+    Render every payslip dict and write them into a ZIP at `output` (a path
+    or binary file object). With more than one worker (None = one per CPU
+    core) the PDFs are rendered in a process pool; results are written as
+    they arrive, in input order.
+
+    Returns the number of payslips written.
+    """
+    workers = workers or os.cpu_count() or 1
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        if workers == 1 or len(payslips) < 2:
+            for data in payslips:
+                archive.writestr(*_render_named(data))
+        else:
+            chunksize = max(1, len(payslips) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for name, pdf_bytes in pool.map(_render_named, payslips, chunksize=chunksize):
+                    archive.writestr(name, pdf_bytes)
+    return len(payslips)
@@ -0,0 +1,137 @@
+# pdf_reports.py
+"""
+Multi-page salary overview PDF: the title and column headers repeat on every
+page, each page ends with a subtotal row and the last page adds a grand total.
+Rendered files are cached on disk per (month, year, data version).
+"""
+import glob
+import os
+
+from fpdf import FPDF
+
+# (header, SalaryRow attribute, base width in mm, alignment, format)
+PDF_COLUMNS = [
+    ("Staff ID", "staff_code", 18, "L", None),
+    ("Name", "name", 30, "L", None),
+    ("Dept", "department", 25, "L", None),
+    ("Desig", "designation", 25, "L", None),
+    ("Base Pay", "gross_salary", 20, "R", "{:.0f}"),
+    ("LOP Days", "lop_days", 20, "C", "{}"),
+    ("LOP Amt", "lop_amount", 20, "R", "{:.0f}"),
+    ("EPF", "epf", 18, "R", "{:.0f}"),
+    ("ESI", "esi", 18, "R", "{:.0f}"),
+    ("IT", "it", 18, "R", "{:.0f}"),
+    ("Loan", "loan", 18, "R", "{:.0f}"),
+    ("Adv", "advance", 18, "R", "{:.0f}"),
+    ("Uniform", "uniform", 18, "R", "{:.0f}"),
+    ("CD", "cd", 18, "R", "{:.0f}"),
+    ("Hostel", "hostel", 18, "R", "{:.0f}"),
+    ("Suspense", "suspense", 18, "R", "{:.0f}"),
+    ("Misc", "misc", 18, "R", "{:.0f}"),
+    ("Net Pay", "net_salary", 22, "R", "{:.0f}"),
+]
+TEXT_LIMITS = {"name": 20, "department": 15, "designation": 15}
+NUMERIC = [attr for _, attr, _, _, fmt in PDF_COLUMNS if fmt]
+ROW_HEIGHT = 6
+
+
+class SalaryReportPDF(FPDF):
+    """A4 landscape report whose header() repeats the table heading on every page."""
+
+    def __init__(self, title):
+        super().__init__(orientation='L', unit='mm', format='A4')
+        self.report_title = title
+        self.set_auto_page_break(False)
+        self.set_margins(8, 10, 8)
+        # Scale the column widths to the printable width
+        base_total = sum(width for _, _, width, _, _ in PDF_COLUMNS)
+        scale = (self.w - self.l_margin - self.r_margin) / base_total
+        self.widths = [width * scale for _, _, width, _, _ in PDF_COLUMNS]
+
+    def header(self):
+        self.set_font('Arial', 'B', 14)
+        self.cell(0, 10, self.report_title, 0, 1, 'C')
+        self.set_font('Arial', 'B', 7)
+        for (header, _, _, _, _), width in zip(PDF_COLUMNS, self.widths):
+            self.cell(width, 7, header, border=1, align='C')
+        self.ln()
+        self.set_font('Arial', '', 7)
+
+    def footer(self):
+        self.set_y(-10)
+        self.set_font('Arial', 'I', 7)
+        self.cell(0, 5, f'Page {self.page_no()}', 0, 0, 'C')
+
+    def totals_row(self, label, totals):
+        self.set_font('Arial', 'B', 7)
+        label_width = sum(self.widths[:4])
+        self.cell(label_width, ROW_HEIGHT, label, border=1, align='R')
+        for (_, attr, _, align, fmt), width in zip(PDF_COLUMNS[4:], self.widths[4:]):
+            self.cell(width, ROW_HEIGHT, fmt.format(totals[attr]), border=1, align=align)
+        self.ln()
+        self.set_font('Arial', '', 7)
+
+    def data_row(self, row):
+        for (_, attr, _, align, fmt), width in zip(PDF_COLUMNS, self.widths):
+            value = getattr(row, attr)
+            if fmt:
+                text = fmt.format(value or 0)
+            else:
+                text = str(value)[:TEXT_LIMITS.get(attr, 20)]
+            self.cell(width, ROW_HEIGHT, text, border=1, align=align)
+        self.ln()
+
+
+def render_salary_pdf(rows, title):
+    """Render SalaryRow objects into PDF bytes with per-page subtotals and a grand total."""
+    pdf = SalaryReportPDF(title)
+    pdf.add_page()
+    # Leave room for the page subtotal (and the grand total on the last page) above the footer
+    limit = pdf.h - 12 - 2 * ROW_HEIGHT
+
+    page_totals = dict.fromkeys(NUMERIC, 0)
+    grand_totals = dict.fromkeys(NUMERIC, 0)
+    for row in rows:
+        if pdf.get_y() + ROW_HEIGHT > limit:
+            pdf.totals_row('Page subtotal', page_totals)
+            pdf.add_page()
+            page_totals = dict.fromkeys(NUMERIC, 0)
+        pdf.data_row(row)
+        for attr in NUMERIC:
+            value = getattr(row, attr) or 0
+            page_totals[attr] += value
+            grand_totals[attr] += value
+
+    pdf.totals_row('Page subtotal', page_totals)
+    pdf.totals_row('Grand total', grand_totals)
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def _cache_prefix(month, year):
+    return f"salary_{year or 'all'}_{month or 'all'}_"
+
+
+def cache_path(cache_dir, month, year, version):
+    """Path of the cached report for (month, year, data version)."""
+    return os.path.join(cache_dir, f"{_cache_prefix(month, year)}{version}.pdf")
+
+
+def store_in_cache(path, pdf_bytes):
+    """
+    Atomically write a rendered report to `path` and drop older versions of
+    the same (month, year) report.
+    """
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        fh.write(pdf_bytes)
+    os.replace(tmp_path, path)
+
+    prefix = os.path.basename(path).rsplit('_', 1)[0] + '_'
+    for stale in glob.glob(os.path.join(cache_dir, f"{prefix}*.pdf")):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
@@ -0,0 +1,115 @@
+# pt_slabs.py
+"""
+In-memory index over the ProfessionalTax slabs.
+
+The slab table is tiny and read on every February/August salary computation,
+so it is loaded once into a sorted list and searched with bisect. Any write to
+the slabs must call bump_slab_version() in the same transaction; that bumps
+the 'pt_slabs' row of data_versions, and every worker process compares that
+row (one primary-key read) before reusing its index, so all of them reload
+after the commit. invalidate_slab_index() additionally drops the local copy
+right away.
+"""
+import bisect
+import logging
+import threading
+
+from models import db, ProfessionalTax, bump_data_version, get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Months in which professional tax is deducted
+PT_MONTHS = (2, 8)
+
+
+class SlabConfigError(ValueError):
+    """Raised when the configured slabs overlap, so a salary would match more than one."""
+
+
+def find_slab_problems(slabs):
+    """
+    Check (range_from, range_to, tax_amount) slabs for overlaps and gaps.
+    Slabs are whole-rupee inclusive ranges, so 0-20999 followed by 21000-...
+    is contiguous. Returns (overlaps, gaps) as lists of (slab, next_slab).
+    """
+    ordered = sorted(slabs, key=lambda s: (s[0], s[1]))
+    overlaps, gaps = [], []
+    for prev, nxt in zip(ordered, ordered[1:]):
+        if nxt[0] <= prev[1]:
+            overlaps.append((prev, nxt))
+        elif nxt[0] - prev[1] > 1:
+            gaps.append((prev, nxt))
+    return overlaps, gaps
+
+
+def overlapping_slabs(range_from, range_to, slabs):
+    """Slabs from `slabs` that share at least one rupee with [range_from, range_to]."""
+    return [s for s in slabs if range_from <= s[1] and s[0] <= range_to]
+
+
+class SlabIndex:
+    """Sorted, non-overlapping slabs searchable by salary in O(log n)."""
+
+    def __init__(self, slabs):
+        overlaps, gaps = find_slab_problems(slabs)
+        if overlaps:
+            described = ", ".join(f"{a[0]:g}-{a[1]:g} / {b[0]:g}-{b[1]:g}" for a, b in overlaps)
+            raise SlabConfigError(f"Overlapping professional tax slabs: {described}")
+        for prev, nxt in gaps:
+            logger.warning("Gap in professional tax slabs between %g and %g; salaries in it pay no PT",
+                           prev[1], nxt[0])
+
+        self.slabs = sorted(slabs, key=lambda s: s[0])
+        self.starts = [s[0] for s in self.slabs]
+        self.gaps = gaps
+
+    def lookup(self, salary):
+        """Return the (range_from, range_to, tax_amount) slab containing `salary`, or None."""
+        i = bisect.bisect_right(self.starts, salary) - 1
+        if i >= 0 and salary <= self.slabs[i][1]:
+            return self.slabs[i]
+        return None
+
+    def tax_for(self, salary):
+        slab = self.lookup(salary)
+        return slab[2] if slab else 0
+
+
+SLAB_VERSION_KEY = 'pt_slabs'
+
+_lock = threading.Lock()
+_version = 0
+_loaded = {"version": None, "index": None}
+
+
+def bump_slab_version():
+    """Bump the shared slab version; call in the transaction that writes ProfessionalTax."""
+    bump_data_version(SLAB_VERSION_KEY)
+
+
+def invalidate_slab_index():
+    """Drop this process's cached index; call after any ProfessionalTax write commits."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def get_slab_index():
+    """Return the cached SlabIndex, reloading it if the slab version changed anywhere."""
+    shared = get_data_version(SLAB_VERSION_KEY)
+    with _lock:
+        version = (_version, shared)
+        if _loaded["version"] != version or _loaded["index"] is None:
+            slabs = [tuple(row) for row in db.session.query(
+                ProfessionalTax.range_from, ProfessionalTax.range_to, ProfessionalTax.tax_amount
+            )]
+            _loaded["index"] = SlabIndex(slabs)
+            _loaded["version"] = version
+        return _loaded["index"]
+
+
+def professional_tax_for(salary, month):
+    """PT due on `salary` for `month` (0 outside February/August)."""
+    if month not in PT_MONTHS:
+        return 0
+    return get_slab_index().tax_for(salary)
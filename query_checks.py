@@ -0,0 +1,124 @@
+# query_checks.py
+"""
+Guards against query-count regressions such as N+1 lazy loads.
+
+- N+1 detector (dev/test mode): with N_PLUS_ONE_DETECTION set to "warn" or
+  "raise", init_query_checks() listens on the app's engines and every request
+  on the routes blueprint groups the SQL statements it executes by their text (parameters are bound separately, so a lazy load
+  repeated per row is the same statement). A statement run more than
+  N_PLUS_ONE_THRESHOLD times is logged, or fails the request with
+  NPlusOneError.
+
+- query_budget(n): context manager / decorator asserting that the enclosed
+  code executes at most n statements, e.g.
+
+      with app.app_context(), query_budget(3):
+          client.get('/salary_overview')
+"""
+import contextlib
+import logging
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 10
+_SHOWN_STATEMENTS = 3
+
+
+class NPlusOneError(RuntimeError):
+    """A request ran the same SQL statement more times than the threshold allows."""
+
+
+class QueryBudgetExceeded(AssertionError):
+    """The code under query_budget() executed more statements than its budget."""
+
+
+def _describe(counts, limit=_SHOWN_STATEMENTS):
+    return "; ".join(f"{n}x {' '.join(statement.split())[:200]}" for statement, n in counts.most_common(limit))
+
+
+# -------------------------
+# N+1 detector (request hooks on the routes blueprint)
+# -------------------------
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        counts = g.get('statement_counts')
+        if counts is not None:
+            counts[statement] += 1
+
+
+def _detection_enabled(app):
+    return app.config.get('N_PLUS_ONE_DETECTION') in ('warn', 'raise')
+
+
+def start_n_plus_one_check():
+    if _detection_enabled(current_app):
+        g.statement_counts = Counter()
+
+
+def finish_n_plus_one_check(response):
+    counts = g.pop('statement_counts', None)
+    if counts is None:
+        return response
+
+    threshold = current_app.config.get('N_PLUS_ONE_THRESHOLD') or DEFAULT_THRESHOLD
+    repeated = Counter({s: n for s, n in counts.items() if n > threshold})
+    if repeated:
+        message = f"Possible N+1 in {request.endpoint}: {_describe(repeated)}"
+        if current_app.config.get('N_PLUS_ONE_DETECTION') == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
+    return response
+
+
+def init_query_checks(app):
+    """Count statements per request on every engine when N+1 detection is on."""
+    if not _detection_enabled(app):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'after_cursor_execute', _count_statement)
+
+
+# -------------------------
+# Query budget assertions
+# -------------------------
+class query_budget(contextlib.ContextDecorator):
+    """
+    Fail with QueryBudgetExceeded if the block (or decorated function) runs
+    more than `max_queries` SQL statements on `engine` (default: all of the
+    app's engines, primary and replica, so an app context is needed). After
+    the block, .count holds the number of statements and .statements their
+    counts by text.
+    """
+
+    def __init__(self, max_queries, engine=None):
+        self.max_queries = max_queries
+        self.engine = engine
+        self.count = 0
+        self.statements = Counter()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements[statement] += 1
+
+    def __enter__(self):
+        self._engines = [self.engine] if self.engine is not None else list(db.engines.values())
+        self.count = 0
+        self.statements = Counter()
+        for engine in self._engines:
+            event.listen(engine, 'after_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for engine in self._engines:
+            event.remove(engine, 'after_cursor_execute', self._on_execute)
+        if exc_type is None and self.count > self.max_queries:
+            raise QueryBudgetExceeded(
+                f"{self.count} queries executed, budget is {self.max_queries}: {_describe(self.statements)}")
+        return False
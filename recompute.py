@@ -0,0 +1,137 @@
+# recompute.py
+"""
+Dirty tracking for finalized SalaryRecords whose inputs changed.
+
+A finalized record (net_salary > 0) depends on the staff member's base
+salary, allowances and EPF/ESI eligibility, on the record's own LOP days and,
+in PT months, on the professional tax slabs. When one of those changes, only
+the affected (staff, month) records are marked in stale_salary_records:
+
+- Staff edits through the ORM (base_salary, allowances, epf_eligible,
+  esi_eligible) are caught by a mapper event;
+- set-based changes (group increments) call mark_staff_dirty();
+- LOP edits call mark_records_dirty();
+- slab writes call mark_pt_dirty() with the old and new ranges.
+
+Only open months (the current month onward) are tracked; months already paid
+are settled through arrears instead. recompute_dirty() re-runs the payroll
+computation for just the marked records, one batch per month, and saving a
+record from the D&R page clears its mark.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import and_, delete, event, func, insert, inspect, literal, or_, select, tuple_
+
+from models import db, Staff, SalaryRecord, StaleSalaryRecord
+from pt_slabs import PT_MONTHS
+from salary_history import salaries_as_of
+
+# Staff columns a finalized record is computed from
+TRACKED_STAFF_COLUMNS = ("base_salary", "allowances", "epf_eligible", "esi_eligible")
+
+
+def _open_period(today=None):
+    today = today or date.today()
+    return or_(SalaryRecord.year > today.year,
+               and_(SalaryRecord.year == today.year, SalaryRecord.month >= today.month))
+
+
+def _mark_statement(condition, reason):
+    """INSERT ... SELECT marking the open, finalized records matching `condition` not yet marked."""
+    already = select(StaleSalaryRecord.staff_id).where(
+        StaleSalaryRecord.staff_id == SalaryRecord.staff_id,
+        StaleSalaryRecord.year == SalaryRecord.year,
+        StaleSalaryRecord.month == SalaryRecord.month,
+    ).exists()
+    return insert(StaleSalaryRecord).from_select(
+        ["staff_id", "year", "month", "reason", "marked_at"],
+        select(SalaryRecord.staff_id, SalaryRecord.year, SalaryRecord.month,
+               literal(reason), literal(datetime.utcnow()))
+        .where(condition, SalaryRecord.net_salary > 0, _open_period(), ~already)
+    )
+
+
+def mark_staff_dirty(condition, reason):
+    """Mark the open records of every staff member matching `condition` (on Staff). The caller commits."""
+    staff_ids = select(Staff.id).where(condition)
+    db.session.execute(_mark_statement(SalaryRecord.staff_id.in_(staff_ids), reason))
+
+
+def mark_records_dirty(keys, reason):
+    """Mark the finalized records among `keys` [(staff_id, year, month)]. The caller commits."""
+    if not keys:
+        return
+    key = tuple_(SalaryRecord.staff_id, SalaryRecord.year, SalaryRecord.month)
+    db.session.execute(_mark_statement(key.in_(list(keys)), reason))
+
+
+def mark_pt_dirty(ranges, reason="pt_slab"):
+    """
+    Mark open PT-month records whose base salary falls in any of `ranges`
+    [(range_from, range_to)] (the old and new extent of a changed slab).
+    The caller commits.
+    """
+    ranges = [r for r in ranges if r]
+    periods = db.session.query(SalaryRecord.year, SalaryRecord.month) \
+        .filter(SalaryRecord.month.in_(PT_MONTHS), SalaryRecord.net_salary > 0, _open_period()) \
+        .distinct().all()
+    keys = []
+    for year, month in periods:
+        staff_ids = [s for (s,) in db.session.query(SalaryRecord.staff_id)
+                     .filter(SalaryRecord.year == year, SalaryRecord.month == month, SalaryRecord.net_salary > 0)]
+        for staff_id, base in salaries_as_of(month, year, staff_ids).items():
+            if any(lo <= base <= hi for lo, hi in ranges):
+                keys.append((staff_id, year, month))
+    mark_records_dirty(keys, reason)
+
+
+def clear_dirty(keys):
+    """Drop the marks of `keys` [(staff_id, year, month)] once they have been recomputed."""
+    if not keys:
+        return
+    key = tuple_(StaleSalaryRecord.staff_id, StaleSalaryRecord.year, StaleSalaryRecord.month)
+    db.session.execute(delete(StaleSalaryRecord).where(key.in_(list(keys))))
+
+
+def dirty_status():
+    """[(year, month, stale records, {reason: count})] for every month with stale records."""
+    counts = defaultdict(lambda: defaultdict(int))
+    for year, month, reason, count in db.session.query(
+            StaleSalaryRecord.year, StaleSalaryRecord.month, StaleSalaryRecord.reason,
+            func.count(StaleSalaryRecord.staff_id)
+    ).group_by(StaleSalaryRecord.year, StaleSalaryRecord.month, StaleSalaryRecord.reason):
+        counts[(year, month)][reason] += count
+    return [(year, month, sum(reasons.values()), dict(reasons))
+            for (year, month), reasons in sorted(counts.items())]
+
+
+def recompute_dirty():
+    """
+    Recompute every stale record, one set-based payroll batch per month, and
+    clear the marks. Returns {"records": int, "months": int, "elapsed": float}.
+    """
+    from payroll import run_payroll
+
+    by_period = defaultdict(list)
+    for staff_id, year, month in db.session.query(
+            StaleSalaryRecord.staff_id, StaleSalaryRecord.year, StaleSalaryRecord.month):
+        by_period[(year, month)].append(staff_id)
+
+    records, elapsed = 0, 0.0
+    for (year, month), staff_ids in sorted(by_period.items()):
+        summary = run_payroll(month, year, overwrite=True, staff_ids=staff_ids)
+        records += summary["updated"] + summary["created"]
+        elapsed += summary["elapsed"]
+        # Inactive staff aren't recomputed; their marks go too
+        clear_dirty([(staff_id, year, month) for staff_id in staff_ids])
+        db.session.commit()
+    return {"records": records, "months": len(by_period), "elapsed": elapsed}
+
+
+@event.listens_for(Staff, 'after_update')
+def _staff_inputs_changed(mapper, connection, target):
+    state = inspect(target)
+    changed = [c for c in TRACKED_STAFF_COLUMNS if state.attrs[c].history.has_changes()]
+    if changed:
+        connection.execute(_mark_statement(SalaryRecord.staff_id == target.id, changed[0]))
@@ -0,0 +1,120 @@
+# records.py
+"""
+Write helpers for SalaryRecord.
+
+All record writes go through upsert_salary_records, which uses the database's
+native "insert or update" on the (staff_id, year, month) unique index, so two
+concurrent saves for the same employee/month can never create duplicate rows.
+Each write also bumps the SalaryPeriodVersion of the months it touched,
+adds its change to their payroll_summary groups and, for full saves, clears
+the records' stale marks.
+"""
+from datetime import datetime
+
+from models import db, SalaryRecord, SalaryPeriodVersion
+from payroll_summary import summary_contributions, apply_summary_delta
+from recompute import clear_dirty
+
+# Columns of the ux_salary_records_staff_period unique index
+CONFLICT_KEYS = ("staff_id", "year", "month")
+
+
+def _insert_for(dialect_name):
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def upsert_salary_records(rows, update_columns=None):
+    """
+    Insert `rows` (dicts of SalaryRecord columns, all with the same keys and
+    including staff_id/year/month). Rows that collide with an existing record
+    for the same staff/month update only `update_columns` (default: every
+    non-key column supplied). The caller commits.
+    """
+    if not rows:
+        return
+    if update_columns is None:
+        update_columns = [c for c in rows[0] if c not in CONFLICT_KEYS]
+
+    table = SalaryRecord.__table__
+    dialect_name = db.session.get_bind().dialect.name
+    insert = _insert_for(dialect_name)
+
+    periods = {(row["year"], row["month"]) for row in rows}
+    keys = [(row["staff_id"], row["year"], row["month"]) for row in rows]
+    before = summary_contributions(keys)
+
+    if insert is None:
+        _upsert_fallback(rows, update_columns)
+        _after_write(keys, periods, update_columns, before)
+        return
+
+    stmt = insert(table)
+    if dialect_name == "mysql":
+        stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(CONFLICT_KEYS),
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+    db.session.execute(stmt, rows)
+    _after_write(keys, periods, update_columns, before)
+
+
+def _after_write(keys, periods, update_columns, before):
+    bump_period_versions(periods)
+    apply_summary_delta(before, summary_contributions(keys))
+    if "net_salary" in update_columns:
+        # Fully recomputed records are no longer stale
+        clear_dirty(keys)
+
+
+def bump_period_versions(periods):
+    """Increment the data version of each (year, month) in `periods`. The caller commits."""
+    if not periods:
+        return
+    table = SalaryPeriodVersion.__table__
+    now = datetime.utcnow()
+    rows = [{"year": y, "month": m, "version": 1, "updated_at": now} for y, m in sorted(periods)]
+    dialect_name = db.session.get_bind().dialect.name
+    insert = _insert_for(dialect_name)
+
+    if insert is None:
+        for row in rows:
+            entry = db.session.get(SalaryPeriodVersion, (row["year"], row["month"]))
+            if entry:
+                entry.version += 1
+                entry.updated_at = now
+            else:
+                db.session.add(SalaryPeriodVersion(**row))
+        db.session.flush()
+        return
+
+    stmt = insert(table)
+    changes = {"version": table.c.version + 1, "updated_at": now}
+    if dialect_name == "mysql":
+        stmt = stmt.on_duplicate_key_update(changes)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=["year", "month"], set_=changes)
+    db.session.execute(stmt, rows)
+
+
+def _upsert_fallback(rows, update_columns):
+    """Read-then-write path for dialects without a native upsert."""
+    for row in rows:
+        record = SalaryRecord.query.filter_by(
+            staff_id=row["staff_id"], year=row["year"], month=row["month"]
+        ).first()
+        if record:
+            for c in update_columns:
+                setattr(record, c, row[c])
+        else:
+            db.session.add(SalaryRecord(**row))
+    db.session.flush()
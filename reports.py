@@ -0,0 +1,220 @@
+# reports.py
+"""
+Read-side query layer for salary reports (salary_overview and the exports).
+
+Queries select only the columns the reports render, join Staff in the same
+statement and hand back lightweight SalaryRow objects instead of ORM
+instances, so there is no per-row lazy load of SalaryRecord.staff_ref.
+"""
+import calendar
+import hashlib
+from functools import lru_cache
+
+from sqlalchemy import and_, func, or_
+
+from models import db, Staff, SalaryRecord, SalaryPeriodVersion
+
+# (attribute name on SalaryRow, column) in report order
+REPORT_COLUMNS = [
+    ("id", SalaryRecord.id),
+    ("year", SalaryRecord.year),
+    ("month", SalaryRecord.month),
+    ("staff_code", Staff.staff_id),
+    ("name", Staff.name),
+    ("department", Staff.department),
+    ("designation", Staff.designation),
+    ("gross_salary", SalaryRecord.gross_salary),
+    ("lop_days", SalaryRecord.lop_days),
+    ("lop_amount", SalaryRecord.lop_amount),
+    ("epf", SalaryRecord.epf),
+    ("esi", SalaryRecord.esi),
+    ("it", SalaryRecord.it),
+    ("loan", SalaryRecord.loan),
+    ("advance", SalaryRecord.advance),
+    ("uniform", SalaryRecord.uniform),
+    ("cd", SalaryRecord.cd),
+    ("hostel", SalaryRecord.hostel),
+    ("suspense", SalaryRecord.suspense),
+    ("misc", SalaryRecord.misc),
+    ("total_deductions", SalaryRecord.total_deductions),
+    ("total_reimbursements", SalaryRecord.total_reimbursements),
+    ("net_salary", SalaryRecord.net_salary),
+]
+
+
+class SalaryRow:
+    """One completed salary record joined with its staff member's details."""
+    __slots__ = tuple(name for name, _ in REPORT_COLUMNS) + ("days_in_month",)
+
+    def __init__(self, values):
+        for (name, _), value in zip(REPORT_COLUMNS, values):
+            setattr(self, name, value)
+        self.days_in_month = days_in_month(self.year, self.month)
+
+    def __repr__(self):
+        return f"<SalaryRow StaffID={self.staff_code} {self.month}/{self.year}>"
+
+
+@lru_cache(maxsize=None)
+def days_in_month(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+def _completed_filter(query, month=None, year=None):
+    query = query.filter(SalaryRecord.net_salary > 0)
+    if month:
+        query = query.filter(SalaryRecord.month == month)
+    if year:
+        query = query.filter(SalaryRecord.year == year)
+    return query
+
+
+def _report_query(month=None, year=None):
+    query = db.session.query(*[column for _, column in REPORT_COLUMNS]) \
+        .join(Staff, SalaryRecord.staff_id == Staff.id)
+    return _completed_filter(query, month, year)
+
+
+def salary_report_query(month=None, year=None):
+    """
+    Column-only query over completed records (net_salary > 0) joined with
+    Staff, optionally filtered by month and/or year, newest period first.
+    """
+    return _report_query(month, year) \
+        .order_by(SalaryRecord.year.desc(), SalaryRecord.month.desc(), SalaryRecord.id.asc())
+
+
+def to_rows(results):
+    """Wrap result tuples as SalaryRow objects (lazily, so it works on streams)."""
+    for values in results:
+        yield SalaryRow(values)
+
+
+def get_salary_rows(month=None, year=None):
+    """All completed records for the filter as a list of SalaryRow."""
+    return list(to_rows(salary_report_query(month, year)))
+
+
+def iter_salary_rows(month=None, year=None, chunk_size=1000):
+    """
+    Stream completed records as SalaryRow objects, fetching `chunk_size`
+    rows per round trip (yield_per) instead of loading the whole result.
+    """
+    return to_rows(salary_report_query(month, year).yield_per(chunk_size))
+
+
+# ============================================================
+# KEYSET PAGINATION + SQL TOTALS (salary_overview)
+# ============================================================
+def encode_cursor(row):
+    return f"{row.year}.{row.month}.{row.id}"
+
+
+def decode_cursor(cursor):
+    """Parse a 'year.month.id' cursor; returns None for missing or malformed input."""
+    try:
+        year, month, record_id = (int(part) for part in cursor.split('.'))
+    except (AttributeError, ValueError):
+        return None
+    return year, month, record_id
+
+
+def _after(year, month, record_id):
+    """Rows that come after the cursor in (year desc, month desc, id asc) order."""
+    return or_(
+        SalaryRecord.year < year,
+        and_(SalaryRecord.year == year, SalaryRecord.month < month),
+        and_(SalaryRecord.year == year, SalaryRecord.month == month, SalaryRecord.id > record_id),
+    )
+
+
+def _before(year, month, record_id):
+    """Rows that come before the cursor in (year desc, month desc, id asc) order."""
+    return or_(
+        SalaryRecord.year > year,
+        and_(SalaryRecord.year == year, SalaryRecord.month > month),
+        and_(SalaryRecord.year == year, SalaryRecord.month == month, SalaryRecord.id < record_id),
+    )
+
+
+def get_salary_page(month=None, year=None, after=None, before=None, page_size=100):
+    """
+    One page of completed records using seek pagination on
+    (year desc, month desc, id asc). Pass the `next_cursor` of a page as
+    `after` to move forward, or its `prev_cursor` as `before` to move back.
+
+    Returns (rows, prev_cursor, next_cursor); a cursor is None at either end.
+    """
+    query = _report_query(month, year)
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+
+    if before_key:
+        # Walk backwards from the cursor, then restore display order
+        query = query.filter(_before(*before_key)).order_by(
+            SalaryRecord.year.asc(), SalaryRecord.month.asc(), SalaryRecord.id.desc())
+        rows = list(to_rows(query.limit(page_size + 1)))
+        has_more_before = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        prev_cursor = encode_cursor(rows[0]) if has_more_before and rows else None
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        return rows, prev_cursor, next_cursor
+
+    if after_key:
+        query = query.filter(_after(*after_key))
+    query = query.order_by(SalaryRecord.year.desc(), SalaryRecord.month.desc(), SalaryRecord.id.asc())
+    rows = list(to_rows(query.limit(page_size + 1)))
+    has_more_after = len(rows) > page_size
+    rows = rows[:page_size]
+    prev_cursor = encode_cursor(rows[0]) if after_key and rows else None
+    next_cursor = encode_cursor(rows[-1]) if has_more_after else None
+    return rows, prev_cursor, next_cursor
+
+
+def get_salary_totals(month=None, year=None):
+    """Record count and gross/deduction/net sums for the whole filtered set, computed in SQL."""
+    query = db.session.query(
+        func.count(SalaryRecord.id),
+        func.coalesce(func.sum(SalaryRecord.gross_salary), 0),
+        func.coalesce(func.sum(SalaryRecord.total_deductions), 0),
+        func.coalesce(func.sum(SalaryRecord.net_salary), 0),
+    )
+    count, gross, deductions, net = _completed_filter(query, month, year).one()
+    return {"count": count, "gross": gross, "deductions": deductions, "net": net}
+
+
+# ============================================================
+# DATA VERSION (cache keys)
+# ============================================================
+def data_version(month=None, year=None):
+    """
+    Short digest identifying the current contents of the months matching the
+    filter. It changes whenever a SalaryRecord in any of those months is
+    written (see records.bump_period_versions).
+    """
+    query = db.session.query(SalaryPeriodVersion.year, SalaryPeriodVersion.month, SalaryPeriodVersion.version)
+    if month:
+        query = query.filter(SalaryPeriodVersion.month == month)
+    if year:
+        query = query.filter(SalaryPeriodVersion.year == year)
+    periods = query.order_by(SalaryPeriodVersion.year, SalaryPeriodVersion.month).all()
+    if not periods:
+        return "0"
+    key = ";".join(f"{y}-{m}:{v}" for y, m, v in periods)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def period_version(month, year):
+    """(version, updated_at) of one month's SalaryRecords; (0, None) if never written."""
+    period = db.session.get(SalaryPeriodVersion, (year, month))
+    if period is None:
+        return 0, None
+    return period.version, period.updated_at
+
+
+def get_lop_map(month, year):
+    """{Staff.id: lop_days} for every SalaryRecord of the month, in one query."""
+    return {
+        staff_id: float(lop_days or 0)
+        for staff_id, lop_days in db.session.query(SalaryRecord.staff_id, SalaryRecord.lop_days)
+        .filter(SalaryRecord.month == month, SalaryRecord.year == year)
+    }
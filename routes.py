@@ -1,17 +1,45 @@
 # app/routes.py
-from flask import Blueprint, render_template, redirect, url_for, request, flash, send_file
+from flask import Blueprint, render_template, redirect, url_for, request, flash, send_file, current_app
+from flask import Response, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from models import db, User, Staff, IncrementHistory, SalaryRecord, ProfessionalTax
+from models import allocate_staff_ids, peek_next_staff_id
 from utils import calculate_salary_components
-from fpdf import FPDF
+from payroll import run_payroll
+from metrics import start_request_timer, record_request, render_metrics
+from database import read_replica
+from query_checks import start_n_plus_one_check, finish_n_plus_one_check
+from recompute import mark_records_dirty, mark_pt_dirty, dirty_status, recompute_dirty
+from payroll_summary import latest_summary_period, get_month_summary, get_monthly_trend
+from user_cache import load_cached_user
+from arrears import compute_arrears, arrears_due, settle_arrears
+from salary_history import salary_as_of, salaries_as_of, record_baseline_versions, record_increment_versions
+from increments import preview_group_increment, apply_group_increment, GROUP_SCOPES, MODES
+from pt_slabs import professional_tax_for, bump_slab_version, invalidate_slab_index, overlapping_slabs
+from staff_search import search_staff, invalidate_staff_index
+from staff_import import import_staff, ImportFormatError, REQUIRED_COLUMNS, OPTIONAL_COLUMNS
+from pdf_reports import render_salary_pdf, cache_path, store_in_cache
+from payslips import get_payslip_data, render_payslip, payslip_filename, write_payslips_zip
 import io
-import pandas as pd
-import calendar
+import os
+import tempfile
 from flask import jsonify
+from records import upsert_salary_records
+from reports import get_salary_page, get_salary_totals, iter_salary_rows, data_version
+from reports import period_version, get_lop_map
+from exports import write_salary_xlsx, iter_csv, iter_ndjson, gzip_chunks
 
 routes = Blueprint('routes', __name__)
 
+# Per-endpoint latency and SQL metrics (see metrics.py)
+routes.before_request(start_request_timer)
+routes.after_request(record_request)
+
+# Dev/test-mode N+1 detection (see query_checks.py)
+routes.before_request(start_n_plus_one_check)
+routes.after_request(finish_n_plus_one_check)
+
 # -------------------------
 # LOGIN MANAGER
 # -------------------------
@@ -21,7 +49,8 @@ login_manager.login_view = 'routes.login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Read-only snapshot from the in-process user cache (no query on a hit)
+    return load_cached_user(user_id)
 
 
 # -------------------------
@@ -119,8 +148,40 @@ def role_access(role):
 # -------------------------
 @routes.route('/dashboard')
 @login_required
+@read_replica
 def dashboard():
-    return render_template('dashboard.html', title='Dashboard', user=current_user)
+    # Payroll widgets for roles that see salaries; read from payroll_summary only
+    summary = None
+    if current_user.is_superuser or current_user.is_accounts or current_user.is_admin:
+        period = None
+        try:
+            year, month = map(int, request.args.get('month', '').split('-'))
+            if 1 <= month <= 12:
+                period = (year, month)
+        except ValueError:
+            pass  # missing or malformed ?month= falls back to the latest month
+        period = period or latest_summary_period()
+        if period:
+            year, month = period
+            departments, totals = get_month_summary(month, year)
+            summary = {
+                "month_str": f"{year}-{month:02d}",
+                "departments": departments,
+                "totals": totals,
+                "trend": get_monthly_trend(),
+            }
+    return render_template('dashboard.html', title='Dashboard', user=current_user, summary=summary)
+
+
+# -------------------------
+# METRICS (Prometheus text format)
+# -------------------------
+@routes.route('/metrics')
+@login_required
+def metrics():
+    if not (current_user.is_admin or current_user.is_superuser):
+        return Response("Access denied\n", status=403, mimetype='text/plain')
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 
 # -------------------------
@@ -134,19 +195,50 @@ def staff_details():
         return redirect(url_for('routes.dashboard'))
 
     search_query = request.args.get('search', '').lower().strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['STAFF_PAGE_SIZE']
 
     if search_query:
-        staff_list = Staff.query.filter(
-            (Staff.name.ilike(f"%{search_query}%")) |
-            (Staff.department.ilike(f"%{search_query}%")) |
-            (Staff.staff_id.like(f"%{search_query}%"))
-        ).all()
+        # Ranked: exact staff ID, then name/department prefix, then fuzzy matches
+        staff_list, total = search_staff(search_query, page=page, per_page=per_page)
     else:
-        staff_list = Staff.query.order_by(Staff.staff_id.asc()).all()
+        total = Staff.query.count()
+        staff_list = Staff.query.order_by(Staff.staff_id.asc()) \
+            .offset((page - 1) * per_page).limit(per_page).all()
 
     return render_template('staff_details.html',
                            title='Staff Details',
-                           staff_list=staff_list)
+                           staff_list=staff_list,
+                           search=search_query,
+                           page=page,
+                           total=total,
+                           has_next=page * per_page < total)
+
+
+@routes.route('/api/staff/search', methods=['GET'])
+@login_required
+def api_staff_search():
+    """
+    Type-ahead staff search.
+    Query params: q, page (default 1), per_page (default 10, max 50)
+    """
+    if not (current_user.is_accounts or current_user.is_superuser or current_user.is_admin or current_user.is_hr):
+        return jsonify({"error": "Access denied"}), 403
+
+    q = request.args.get('q', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 50)
+
+    staff_list, total = search_staff(q, page=page, per_page=per_page)
+    return jsonify({
+        "total": total,
+        "page": page,
+        "results": [
+            {"id": s.id, "staff_id": s.staff_id, "name": s.name,
+             "department": s.department, "designation": s.designation}
+            for s in staff_list
+        ]
+    }), 200
 
 
 # -------------------------
@@ -159,12 +251,8 @@ def new_staff():
         flash("Access denied: HR users only.", "error")
         return redirect(url_for('routes.dashboard'))
 
-    last_staff = Staff.query.order_by(Staff.staff_id.desc()).first()
-    next_staff_id = (last_staff.staff_id + 1) if last_staff else 1001
-
     if request.method == 'POST':
         staff = Staff(
-            staff_id=next_staff_id,
             name=request.form['name'],
             category=request.form['category'],
             department=request.form['department'],
@@ -182,18 +270,70 @@ def new_staff():
             active=True 
         )
 
-        db.session.add(staff)
-        db.session.commit()
+        try:
+            # Atomic allocation from the staff_id sequence (no max-scan, no collisions)
+            staff.staff_id = allocate_staff_ids(1)
+            db.session.add(staff)
+            db.session.flush()
+            record_baseline_versions(Staff.id == staff.id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error adding staff member: {e}", "error")
+            return redirect(url_for('routes.new_staff'))
+        invalidate_staff_index()
 
         flash(f"Staff member '{staff.name}' added successfully with ID {staff.staff_id}!", "success")
         return redirect(url_for('routes.new_staff'))
 
-    return render_template('new_staff.html', title='New Staff Entry', next_staff_id=next_staff_id)
+    return render_template('new_staff.html', title='New Staff Entry', next_staff_id=peek_next_staff_id())
+
+
+# -------------------------
+# BULK STAFF IMPORT
+# -------------------------
+@routes.route('/staff/import', methods=['GET', 'POST'])
+@login_required
+def staff_import():
+    if not (current_user.is_hr or current_user.is_superuser):
+        flash("Access denied: HR users only.", "error")
+        return redirect(url_for('routes.dashboard'))
+
+    result = None
+    if request.method == 'POST':
+        upload = request.files.get('staff_file')
+        if not upload or not upload.filename:
+            flash("Choose a CSV or Excel file to import.", "error")
+            return redirect(url_for('routes.staff_import'))
+
+        try:
+            result = import_staff(upload.stream, upload.filename)
+        except ImportFormatError as e:
+            flash(str(e), "error")
+            return redirect(url_for('routes.staff_import'))
+
+        if result['created']:
+            invalidate_staff_index()
+        flash(f"Imported {result['created']} staff member(s); {len(result['errors'])} row(s) rejected.",
+              "success" if result['created'] else "warning")
+
+    return render_template('staff_import.html',
+                           title='Import Staff',
+                           result=result,
+                           required_columns=REQUIRED_COLUMNS,
+                           optional_columns=OPTIONAL_COLUMNS)
 
 
 # -------------------------
 # LOSS OF PAY ENTRY (ADMIN ONLY) - ONLY SAVES LOP, NO SALARY RECORD
 # -------------------------
+def _active_staff():
+    """Active staff for the LOP and D&R dropdowns/grids. Commit and rollback
+    expire loaded rows, so pages that render after either reload the list
+    with this one query instead of lazy-loading each row in the template."""
+    return Staff.query.filter_by(active=True).order_by(Staff.name.asc()).all()
+
+
 @routes.route('/lop', methods=['GET', 'POST'])
 @login_required
 def lop_page():
@@ -201,7 +341,7 @@ def lop_page():
         flash("Access denied: Admins users only.", "error")
         return redirect(url_for('routes.dashboard'))
 
-    staff_list = Staff.query.filter_by(active=True).order_by(Staff.name.asc()).all()
+    staff_list = _active_staff()
     today = date.today()
 
     # Default month/year = current
@@ -212,48 +352,63 @@ def lop_page():
         month, year = today.month, today.year
         selected_month_str = f"{year}-{month:02d}"
 
+    # Prefetch this month's LOP values in one query: {staff.id: (record id, lop_days)}
+    existing = {
+        staff_id: (record_id, lop_days)
+        for record_id, staff_id, lop_days in db.session.query(
+            SalaryRecord.id, SalaryRecord.staff_id, SalaryRecord.lop_days
+        ).filter(SalaryRecord.month == month, SalaryRecord.year == year)
+    }
+
+    lop_map = {staff_id: lop_days for staff_id, (_, lop_days) in existing.items()}
+
     if request.method == 'POST':
         try:
+            base_salaries = salaries_as_of(month, year)
+            rows, updated, added = [], 0, 0
             for staff in staff_list:
                 lop_value = request.form.get(f'lop_{staff.id}')
                 if lop_value and lop_value.strip() != '':
                     lop_days = float(lop_value)
-                    
-                    # Find or create a "draft" salary record with only LOP data
-                    record = SalaryRecord.query.filter_by(
-                        staff_id=staff.id,
-                        month=month,
-                        year=year
-                    ).first()
-
-                    if record:
-                        # Update existing record's LOP
-                        record.lop_days = lop_days
+
+                    if staff.id in existing:
+                        # Skip rows whose LOP didn't change
+                        if (existing[staff.id][1] or 0) == lop_days:
+                            continue
+                        updated += 1
                     else:
-                        # Create new record with only LOP and gross salary
-                        # Don't compute final net salary yet - that happens in D&R page
-                        new_record = SalaryRecord(
-                            staff_id=staff.id,
-                            month=month,
-                            year=year,
-                            lop_days=lop_days,
-                            gross_salary=staff.base_salary + (staff.allowances or 0),
-                            # All other fields remain 0/default
-                            net_salary=0  # Will be calculated in D&R page
-                        )
-                        db.session.add(new_record)
-            
+                        added += 1
+
+                    # Draft record with only LOP and gross salary; on conflict
+                    # only lop_days is touched. Don't compute final net salary
+                    # yet - that happens in D&R page
+                    rows.append({
+                        "staff_id": staff.id,
+                        "month": month,
+                        "year": year,
+                        "lop_days": lop_days,
+                        "gross_salary": base_salaries[staff.id] + (staff.allowances or 0),
+                        "net_salary": 0
+                    })
+
+            upsert_salary_records(rows, update_columns=["lop_days"])
+            mark_records_dirty([(row["staff_id"], year, month) for row in rows], "lop")
             db.session.commit()
-            flash(f"LOP days for {selected_month_str} updated successfully!", "success")
+
+            lop_map.update((row["staff_id"], row["lop_days"]) for row in rows)
+            flash(f"LOP days for {selected_month_str} updated successfully "
+                  f"({updated} updated, {added} added).", "success")
 
         except Exception as e:
             db.session.rollback()
             flash(f"Error updating LOP days: {e}", "error")
+        staff_list = _active_staff()
 
     return render_template(
         'lop.html',
         title='Loss of Pay',
         staff_list=staff_list,
+        lop_map=lop_map,
         selected_month=selected_month_str,
         selected_year=year,
         selected_month_int=month,
@@ -282,6 +437,48 @@ def api_get_lop():
     lop_days = float(rec.lop_days) if rec and rec.lop_days is not None else 0.0
     return jsonify({"lop_days": lop_days}), 200
 
+
+@routes.route('/api/lop', methods=['GET'])
+@login_required
+def api_lop():
+    """
+    Whole month's LOP map {staff db id: lop_days} in one response.
+    Query params: month, year
+
+    The ETag / Last-Modified follow the month's SalaryPeriodVersion, so a
+    conditional re-request is answered with 304 without reading the records.
+    """
+    if not (current_user.is_superuser or current_user.is_accounts or current_user.is_admin):
+        return jsonify({"error": "Access denied"}), 403
+
+    month = request.args.get('month', type=int)
+    year = request.args.get('year', type=int)
+    if not (month and year and 1 <= month <= 12):
+        return jsonify({"error": "month and year are required"}), 400
+
+    version, updated_at = period_version(month, year)
+    etag = f"lop-{year}-{month:02d}-v{version}"
+    last_modified = updated_at.replace(microsecond=0, tzinfo=timezone.utc) if updated_at else None
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(last_modified and request.if_modified_since
+                            and request.if_modified_since >= last_modified)
+
+    if not_modified:
+        response = Response(status=304)
+    else:
+        lop = get_lop_map(month, year)
+        response = jsonify({"month": month, "year": year, "version": version,
+                            "lop": {str(staff_id): days for staff_id, days in lop.items()}})
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Let the browser keep the map but revalidate it on every use
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 # -------------------------
 # DEDUCTIONS & REIMBURSEMENTS - COMPLETES THE SALARY RECORD
 # -------------------------
@@ -292,7 +489,7 @@ def d_r_page():
         flash("Access denied: Accounts users only.", "error")
         return redirect(url_for('routes.dashboard'))
 
-    staff_list = Staff.query.filter_by(active=True).order_by(Staff.name.asc()).all()
+    staff_list = _active_staff()
     result = None
     selected_staff_id = None
     selected_month = None
@@ -325,7 +522,9 @@ def d_r_page():
             # Get LOP days (from existing record or default to 0)
             lop_days = existing_record.lop_days if existing_record else 0
 
-            gross = staff.base_salary + (getattr(staff, 'allowances', 0) or 0)
+            # Base salary in force for that month, not today's
+            base_salary = salary_as_of(staff.id, month, year)
+            gross = base_salary + (getattr(staff, 'allowances', 0) or 0)
             
             deductions = {
                 "it": float(request.form.get('income_tax', 0)),
@@ -344,18 +543,13 @@ def d_r_page():
                 if x and str(x).strip()
             ]
 
-            # Apply Professional Tax Logic
-            pt_deduction = 0
-            if month in [2, 8]:
-                slab = ProfessionalTax.query.filter(
-                    ProfessionalTax.range_from <= staff.base_salary,
-                    ProfessionalTax.range_to >= staff.base_salary
-                ).first()
-                if slab:
-                    pt_deduction = slab.tax_amount
-                    deductions["professional_tax"] = pt_deduction
-            else:
-                deductions["professional_tax"] = 0
+            # Arrears of back-dated increments are paid with this month's salary
+            arrears = arrears_due(month, year, [staff.id]).get(staff.id, 0)
+            if arrears:
+                reimbursements.append(arrears)
+
+            # Apply Professional Tax Logic (February & August, cached slab index)
+            deductions["professional_tax"] = professional_tax_for(base_salary, month)
 
             epf_eligible = getattr(staff, "epf_eligible", False)
 
@@ -371,52 +565,35 @@ def d_r_page():
                 esi_eligible=staff.esi_eligible
             )
 
-            # Update or create the final salary record
-            if existing_record:
-                # Update existing record with complete data
-                existing_record.gross_salary = result['adjusted_gross']
-                existing_record.lop_days = lop_days
-                existing_record.lop_amount = result['lop_amount']
-                existing_record.epf = result['epf']
-                existing_record.esi = result['esi']
-                existing_record.it = deductions["it"]
-                existing_record.loan = deductions["loan"]
-                existing_record.advance = deductions["advance"]
-                existing_record.uniform = deductions["uniform"]
-                existing_record.cd = deductions["cd"]
-                existing_record.hostel = deductions["hostel"]
-                existing_record.misc = deductions["misc"]
-                existing_record.total_deductions = result['total_deductions']
-                existing_record.total_reimbursements = result['total_reimbursements']
-                existing_record.net_salary = result['net_salary']
-            else:
-                # Create new record (in case LOP wasn't entered)
-                record = SalaryRecord(
-                    staff_id=staff.id,
-                    month=month,
-                    year=year,
-                    gross_salary=result['adjusted_gross'],
-                    lop_days=lop_days,
-                    lop_amount=result['lop_amount'],
-                    epf=result['epf'],
-                    esi=result['esi'],
-                    it=deductions["it"],
-                    loan=deductions["loan"],
-                    advance=deductions["advance"],
-                    uniform=deductions["uniform"],
-                    cd=deductions["cd"],
-                    hostel=deductions["hostel"],
-                    suspense=deductions["suspense"],
-                    misc=deductions["misc"],
-                    total_deductions=result['total_deductions'],
-                    total_reimbursements=result['total_reimbursements'],
-                    net_salary=result['net_salary']
-                )
-                db.session.add(record)
-
+            # Insert or update the final salary record (creates it in case LOP wasn't entered)
+            upsert_salary_records([{
+                "staff_id": staff.id,
+                "month": month,
+                "year": year,
+                "gross_salary": result['adjusted_gross'],
+                "lop_days": lop_days,
+                "lop_amount": result['lop_amount'],
+                "epf": result['epf'],
+                "esi": result['esi'],
+                "it": deductions["it"],
+                "loan": deductions["loan"],
+                "advance": deductions["advance"],
+                "uniform": deductions["uniform"],
+                "cd": deductions["cd"],
+                "hostel": deductions["hostel"],
+                "suspense": deductions["suspense"],
+                "misc": deductions["misc"],
+                "total_deductions": result['total_deductions'],
+                "total_reimbursements": result['total_reimbursements'],
+                "net_salary": result['net_salary']
+            }])
+            settle_arrears(month, year, [staff.id])
             db.session.commit()
+            staff_list = _active_staff()
 
             flash(f"Salary record for {staff.name} (Staff ID: {staff.staff_id}) for {month_str} saved successfully!", "success")
+            if arrears:
+                flash(f"Arrears of ₹{arrears:,.2f} included in reimbursements.", "success")
 
             return render_template(
                 'd_r.html',
@@ -431,6 +608,7 @@ def d_r_page():
         except Exception as e:
             db.session.rollback()
             flash(f"Error saving salary record: {str(e)}", "error")
+            staff_list = _active_staff()
 
     return render_template('d_r.html',
                            title='Deductions & Reimbursements',
@@ -442,11 +620,71 @@ def d_r_page():
                            )
 
 
+# -------------------------
+# MONTH-END PAYROLL RUN - FINALIZES EVERY ACTIVE STAFF RECORD
+# -------------------------
+@routes.route('/payroll/run', methods=['POST'])
+@login_required
+def payroll_run():
+    if not (current_user.is_accounts or current_user.is_superuser):
+        flash("Access denied: Accounts users only.", "error")
+        return redirect(url_for('routes.dashboard'))
+
+    month_str = request.form.get('payroll_month')
+    if not month_str:
+        flash("Missing month selection.", "error")
+        return redirect(url_for('routes.d_r_page'))
+
+    try:
+        period = datetime.strptime(month_str, '%Y-%m')
+    except ValueError:
+        flash(f"Invalid month '{month_str}': expected YYYY-MM.", "error")
+        return redirect(url_for('routes.d_r_page'))
+    year, month = period.year, period.month
+    overwrite = request.form.get('overwrite') == 'yes'
+
+    try:
+        summary = run_payroll(month, year, overwrite=overwrite)
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error running payroll: {e}", "error")
+        return redirect(url_for('routes.d_r_page'))
+
+    flash(f"Payroll for {month_str}: {summary['created']} created, {summary['updated']} updated, "
+          f"{summary['skipped']} skipped in {summary['elapsed']:.2f}s.", "success")
+    return redirect(url_for('routes.d_r_page'))
+
+
+# -------------------------
+# STALE RECORDS - STATUS AND BATCH RECOMPUTE
+# -------------------------
+@routes.route('/payroll/stale', methods=['GET', 'POST'])
+@login_required
+def payroll_stale():
+    if not (current_user.is_accounts or current_user.is_superuser):
+        flash("Access denied: Accounts users only.", "error")
+        return redirect(url_for('routes.dashboard'))
+
+    if request.method == 'POST':
+        try:
+            summary = recompute_dirty()
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error recomputing stale records: {e}", "error")
+            return redirect(url_for('routes.payroll_stale'))
+        flash(f"Recomputed {summary['records']} stale record(s) across {summary['months']} month(s) "
+              f"in {summary['elapsed']:.2f}s.", "success")
+        return redirect(url_for('routes.payroll_stale'))
+
+    return render_template('payroll_stale.html', title='Stale Salary Records', status=dirty_status())
+
+
 # -------------------------
 # SALARY OVERVIEW + EXPORTS
 # -------------------------
 @routes.route('/salary_overview', methods=['GET'])
 @login_required
+@read_replica
 def salary_overview():
     if not (current_user.is_admin or current_user.is_superuser):
         flash("Access denied: Admin users only.", "error")
@@ -454,21 +692,26 @@ def salary_overview():
 
     month = request.args.get('month', type=int)
     year = request.args.get('year', type=int)
-
-    query = SalaryRecord.query.join(Staff).filter(SalaryRecord.net_salary > 0)  # Only show completed records
-    if month:
-        query = query.filter(SalaryRecord.month == month)
-    if year:
-        query = query.filter(SalaryRecord.year == year)
-
-    records = query.order_by(SalaryRecord.year.desc(), SalaryRecord.month.desc()).all()
-    for r in records:
-        r.days_in_month = calendar.monthrange(r.year, r.month)[1]
+    page_size = request.args.get('per_page', type=int) or current_app.config['SALARY_OVERVIEW_PAGE_SIZE']
+    page_size = max(1, min(page_size, 1000))
+
+    # Only completed records, one keyset page at a time
+    records, prev_cursor, next_cursor = get_salary_page(
+        month, year,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        page_size=page_size
+    )
+    totals = get_salary_totals(month, year)
 
     return render_template(
         'salary_overview.html',
         title='Salary Overview',
         records=records,
+        totals=totals,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
+        page_size=page_size,
         selected_month=month,
         selected_year=year
     )
@@ -476,6 +719,7 @@ def salary_overview():
 
 @routes.route('/export_salary_excel')
 @login_required
+@read_replica
 def export_salary_excel():
     if not current_user.is_accounts and not current_user.is_admin and not current_user.is_superuser:
         flash("Access denied: Accounts users only.", "error")
@@ -484,47 +728,14 @@ def export_salary_excel():
     month = request.args.get('month', type=int)
     year = request.args.get('year', type=int)
 
-    query = SalaryRecord.query.join(Staff).filter(SalaryRecord.net_salary > 0)
-    if month:
-        query = query.filter(SalaryRecord.month == month)
-    if year:
-        query = query.filter(SalaryRecord.year == year)
-
-    records = query.all()
-    if not records:
+    # Stream rows from the DB in chunks straight into a constant-memory
+    # workbook on a temp file (deleted when the response closes it)
+    rows = iter_salary_rows(month, year, chunk_size=current_app.config['EXPORT_CHUNK_SIZE'])
+    output = tempfile.TemporaryFile()
+    if not write_salary_xlsx(rows, output):
+        output.close()
         flash("No records to export for the selected period.", "warning")
         return redirect(url_for('routes.salary_overview', month=month, year=year))
-
-    data = []
-    for r in records:
-        days_in_month = calendar.monthrange(r.year, r.month)[1]
-        lop_per_day = (r.gross_salary / days_in_month) if days_in_month else 0
-        data.append({
-            "Staff ID": r.staff_ref.staff_id,
-            "Name": r.staff_ref.name,
-            "Department": r.staff_ref.department,
-            "Designation": r.staff_ref.designation,
-            "Base Pay": r.gross_salary,
-            "LOP Days": r.lop_days,
-            "LOP Amount": r.lop_amount,
-            "EPF": r.epf,
-            "ESI": r.esi,
-            "IT": r.it or 0,
-            "Loan": r.loan or 0,
-            "Advance": r.advance or 0,
-            "Uniform": r.uniform or 0,
-            "CD": r.cd or 0,
-            "Hostel": r.hostel or 0,
-            "Suspense": r.suspense or 0,
-            "Misc": r.misc or 0,
-            "Total Deductions": r.total_deductions,
-            "Reimbursements": r.total_reimbursements,
-            "Net Salary": r.net_salary
-        })
-
-    df = pd.DataFrame(data)
-    output = io.BytesIO()
-    df.to_excel(output, index=False, sheet_name="Salary Overview")
     output.seek(0)
 
     filename = f"Salary_Overview_{year or 'All'}_{month or 'All'}.xlsx"
@@ -533,72 +744,128 @@ def export_salary_excel():
                      mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
 
+def _stream_export(chunks, mimetype, filename):
+    """Send a generator-backed export, gzip-compressed when the client accepts it."""
+    headers = {"Content-Disposition": f"attachment; filename={filename}", "Vary": "Accept-Encoding"}
+    if 'gzip' in request.accept_encodings:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+
+@routes.route('/export_salary_csv')
+@login_required
+@read_replica
+def export_salary_csv():
+    if not current_user.is_accounts and not current_user.is_admin and not current_user.is_superuser:
+        flash("Access denied: Accounts users only.", "error")
+        return redirect(url_for('routes.dashboard'))
+
+    month = request.args.get('month', type=int)
+    year = request.args.get('year', type=int)
+
+    rows = iter_salary_rows(month, year, chunk_size=current_app.config['EXPORT_CHUNK_SIZE'])
+    return _stream_export(iter_csv(rows), 'text/csv',
+                          f"Salary_Overview_{year or 'All'}_{month or 'All'}.csv")
+
+
+@routes.route('/export_salary_ndjson')
+@login_required
+@read_replica
+def export_salary_ndjson():
+    if not current_user.is_accounts and not current_user.is_admin and not current_user.is_superuser:
+        flash("Access denied: Accounts users only.", "error")
+        return redirect(url_for('routes.dashboard'))
+
+    month = request.args.get('month', type=int)
+    year = request.args.get('year', type=int)
+
+    rows = iter_salary_rows(month, year, chunk_size=current_app.config['EXPORT_CHUNK_SIZE'])
+    return _stream_export(iter_ndjson(rows), 'application/x-ndjson',
+                          f"Salary_Overview_{year or 'All'}_{month or 'All'}.ndjson")
+
+
 @routes.route('/export_salary_pdf')
 @login_required
+@read_replica
 def export_salary_pdf():
     month = request.args.get('month', type=int)
     year = request.args.get('year', type=int)
 
-    query = SalaryRecord.query.join(Staff).filter(SalaryRecord.net_salary > 0)
-    if month:
-        query = query.filter(SalaryRecord.month == month)
-    if year:
-        query = query.filter(SalaryRecord.year == year)
+    # Serve from the on-disk cache unless the period's data changed since it was rendered
+    path = cache_path(current_app.config['REPORT_CACHE_DIR'], month, year, data_version(month, year))
+    if not os.path.exists(path):
+        if not get_salary_totals(month, year)["count"]:
+            flash("No records found for the selected period.", "error")
+            return redirect(url_for('routes.salary_overview'))
 
-    records = query.all()
-    if not records:
-        flash("No records found for the selected period.", "error")
-        return redirect(url_for('routes.salary_overview'))
+        rows = iter_salary_rows(month, year, chunk_size=current_app.config['EXPORT_CHUNK_SIZE'])
+        store_in_cache(path, render_salary_pdf(
+            rows, f"Salary Overview Report - {month or 'All'}/{year or 'All'}"))
 
-    pdf = FPDF(orientation='L', unit='mm', format='A4')
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, f'Salary Overview Report - {month}/{year}', 0, 1, 'C')
-
-    pdf.set_font('Arial', 'B', 9)
-    headers = [
-        "Staff ID", "Name", "Dept", "Desig", "Base Pay", "LOP Days", "LOP Amt",
-        "EPF", "ESI", "IT", "Loan", "Adv", "Uniform", "CD", "Hostel", "Suspense", "Misc", "Net Pay"
-    ]
-    col_widths = [18, 30, 25, 25, 20, 20, 20, 18, 18, 18, 18, 18, 18, 18, 18, 18, 18, 22]
-
-    for i, h in enumerate(headers):
-        pdf.cell(col_widths[i], 8, h, border=1, align='C')
-    pdf.ln()
-
-    pdf.set_font('Arial', '', 8)
-    for r in records:
-        pdf.cell(col_widths[0], 8, str(r.staff_ref.staff_id), border=1)
-        pdf.cell(col_widths[1], 8, r.staff_ref.name[:20], border=1)
-        pdf.cell(col_widths[2], 8, r.staff_ref.department[:15], border=1)
-        pdf.cell(col_widths[3], 8, r.staff_ref.designation[:15], border=1)
-        pdf.cell(col_widths[4], 8, f"{r.gross_salary:.0f}", border=1, align='R')
-        pdf.cell(col_widths[5], 8, f"{r.lop_days}", border=1, align='C')
-        pdf.cell(col_widths[6], 8, f"{r.lop_amount:.0f}", border=1, align='R')
-        pdf.cell(col_widths[7], 8, f"{r.epf:.0f}", border=1, align='R')
-        pdf.cell(col_widths[8], 8, f"{r.esi:.0f}", border=1, align='R')
-        pdf.cell(col_widths[9], 8, f"{r.it:.0f}", border=1, align='R')
-        pdf.cell(col_widths[10], 8, f"{r.loan:.0f}", border=1, align='R')
-        pdf.cell(col_widths[11], 8, f"{r.advance:.0f}", border=1, align='R')
-        pdf.cell(col_widths[12], 8, f"{r.uniform:.0f}", border=1, align='R')
-        pdf.cell(col_widths[13], 8, f"{r.cd:.0f}", border=1, align='R')
-        pdf.cell(col_widths[14], 8, f"{r.hostel:.0f}", border=1, align='R')
-        pdf.cell(col_widths[15], 8, f"{r.suspense:.0f}", border=1, align='R')
-        pdf.cell(col_widths[16], 8, f"{r.misc:.0f}", border=1, align='R')
-        pdf.cell(col_widths[17], 8, f"{r.net_salary:.0f}", border=1, align='R')
-        pdf.ln()
-
-    pdf_bytes = pdf.output(dest='S').encode('latin-1')
-    pdf_output = io.BytesIO(pdf_bytes)
-
-    return send_file(pdf_output, as_attachment=True,
+    return send_file(path, as_attachment=True,
                      download_name=f"Salary_Report_{month}_{year}.pdf",
                      mimetype='application/pdf')
 
 
+# -------------------------
+# PAYSLIPS
+# -------------------------
+@routes.route('/payslip/<int:record_id>')
+@login_required
+def payslip(record_id):
+    if not (current_user.is_accounts or current_user.is_admin or current_user.is_superuser):
+        flash("Access denied: Accounts users only.", "error")
+        return redirect(url_for('routes.dashboard'))
+
+    payslips = get_payslip_data(record_id=record_id)
+    if not payslips:
+        flash("No completed salary record found for that payslip.", "error")
+        return redirect(url_for('routes.salary_overview'))
+
+    return send_file(io.BytesIO(render_payslip(payslips[0])), as_attachment=True,
+                     download_name=payslip_filename(payslips[0]),
+                     mimetype='application/pdf')
+
+
+@routes.route('/payslips')
+@login_required
+def payslips_zip():
+    if not (current_user.is_accounts or current_user.is_admin or current_user.is_superuser):
+        flash("Access denied: Accounts users only.", "error")
+        return redirect(url_for('routes.dashboard'))
+
+    month = request.args.get('month', type=int)
+    year = request.args.get('year', type=int)
+    if not (month and year):
+        flash("Select a month and year to download payslips.", "error")
+        return redirect(url_for('routes.salary_overview'))
+
+    payslips = get_payslip_data(month, year)
+    if not payslips:
+        flash("No records found for the selected period.", "error")
+        return redirect(url_for('routes.salary_overview', month=month, year=year))
+
+    # Rendered serially in this request into a temp-file ZIP (deleted when the
+    # response closes it); parallel bulk runs go through `flask export-payslips`
+    output = tempfile.TemporaryFile()
+    write_payslips_zip(payslips, output)
+    output.seek(0)
+
+    return send_file(output, as_attachment=True,
+                     download_name=f"Payslips_{year}_{month:02d}.zip",
+                     mimetype='application/zip')
+
+
 # -------------------------
 # FIXER PAGE
 # -------------------------
+def _flash_arrears(arrears):
+    if arrears['records']:
+        flash(f"Back-dated increment: arrears of ₹{arrears['total']:,.2f} for {arrears['records']} "
+              f"paid month(s) of {arrears['staff']} staff will be paid with this month's salary.", "success")
+
+
 @routes.route('/fixer', methods=['GET', 'POST'])
 @login_required
 def fixer():
@@ -610,15 +877,57 @@ def fixer():
     # Fetch dropdown data
     departments = [d[0] for d in db.session.query(Staff.department).distinct()]
     designations = [d[0] for d in db.session.query(Staff.designation).distinct()]
+    categories = [c[0] for c in db.session.query(Staff.category).distinct()]
     staff_list = Staff.query.order_by(Staff.name.asc()).all()
+    preview = None
 
-    # POST logic
-    if request.method == 'POST':
+    # Group increment (department / designation / category): preview or apply
+    scope = request.form.get('scope', 'individual')
+    if request.method == 'POST' and scope in GROUP_SCOPES:
+        mode = request.form.get('mode', 'flat')
+        target = request.form.get(scope)
+        try:
+            increment_value = float(request.form.get('increment_value') or 0)
+        except ValueError:
+            increment_value = 0
+        effective_date = request.form.get('effective_date')
+
+        if mode not in MODES or not target or increment_value <= 0:
+            flash("Please fill all required fields properly.", "error")
+            return redirect(url_for('routes.fixer'))
+
+        if request.form.get('action') != 'apply':
+            preview = preview_group_increment(scope, target, mode, increment_value)
+            preview['effective_date'] = effective_date
+            if not preview['headcount']:
+                flash(f"No active staff found for {scope} '{target}'.", "error")
+                preview = None
+        elif not effective_date:
+            flash("Please choose an effective date.", "error")
+            return redirect(url_for('routes.fixer'))
+        else:
+            try:
+                summary = apply_group_increment(scope, target, mode, increment_value, effective_date)
+                db.session.commit()
+                flash(f"✅ Increment applied to {summary['headcount']} staff in {scope} '{target}'. "
+                      f"Monthly base pay ₹{summary['current_total']:,.2f} → ₹{summary['new_total']:,.2f} "
+                      f"(+₹{summary['monthly_increase']:,.2f}).", "success")
+                _flash_arrears(summary['arrears'])
+            except Exception as e:
+                db.session.rollback()
+                flash(f"Database error: {e}", "error")
+            return redirect(url_for('routes.fixer'))
+
+    # Individual increment
+    elif request.method == 'POST':
         staff_id = request.form.get('staff_id')
-        increment_value = float(request.form.get('increment_value') or 0)
+        try:
+            increment_value = float(request.form.get('increment_value') or 0)
+        except ValueError:
+            increment_value = 0
         effective_date = request.form.get('effective_date')
 
-        if not staff_id or increment_value <= 0:
+        if not staff_id or increment_value <= 0 or not effective_date:
             flash("Please fill all required fields properly.", "error")
             return redirect(url_for('routes.fixer'))
 
@@ -628,25 +937,29 @@ def fixer():
             flash("Staff record not found.", "error")
             return redirect(url_for('routes.fixer'))
 
-        # Apply the increment
         old_salary = staff.base_salary
-        staff.base_salary = old_salary + increment_value
-
-        # Log increment history
-        new_record = IncrementHistory(
-            increment_type='Base Pay Increment',
-            target=staff.name,
-            mode='Manual',
-            value=increment_value,
-            effective_month=effective_date
-        )
-        db.session.add(new_record)
-
         try:
+            # Apply the increment (salary history from the effective month, then current base pay)
+            record_increment_versions(Staff.id == staff.id, effective_date,
+                                      lambda amount: amount + increment_value)
+            arrears = compute_arrears(Staff.id == staff.id, effective_date)
+            staff.base_salary = old_salary + increment_value
+
+            # Log increment history
+            new_record = IncrementHistory(
+                increment_type='Base Pay Increment',
+                target=staff.name,
+                mode='Manual',
+                value=increment_value,
+                effective_month=effective_date
+            )
+            db.session.add(new_record)
+
             db.session.commit()
             flash(f"✅ Increment of ₹{increment_value:,.2f} applied successfully to {staff.name} "
                   f"(ID {staff_id}). Base Pay updated from ₹{old_salary:,.2f} → ₹{staff.base_salary:,.2f}.",
                   "success")
+            _flash_arrears(arrears)
         except Exception as e:
             db.session.rollback()
             flash(f"Database error: {e}", "error")
@@ -658,11 +971,27 @@ def fixer():
                            title='Salary Fixer',
                            departments=departments,
                            designations=designations,
-                           staff_list=staff_list)
+                           categories=categories,
+                           staff_list=staff_list,
+                           preview=preview)
 
 # -------------------------
 # PROFESSIONAL TAX PAGE
 # -------------------------
+def _slab_clash(range_from, range_to, exclude_id=None):
+    """Error message if [range_from, range_to] is inverted or overlaps another slab, else None."""
+    if range_from > range_to:
+        return "Range From must not be greater than Range To."
+    query = db.session.query(ProfessionalTax.range_from, ProfessionalTax.range_to, ProfessionalTax.tax_amount)
+    if exclude_id is not None:
+        query = query.filter(ProfessionalTax.id != exclude_id)
+    clashes = overlapping_slabs(range_from, range_to, [tuple(s) for s in query])
+    if clashes:
+        existing = ", ".join(f"₹{int(a)}–₹{int(b)}" for a, b, _ in clashes)
+        return f"Slab ₹{int(range_from)}–₹{int(range_to)} overlaps existing slab(s): {existing}."
+    return None
+
+
 @routes.route('/professional-tax', methods=['GET', 'POST'])
 @login_required
 def professional_tax():
@@ -675,9 +1004,17 @@ def professional_tax():
         range_to = float(request.form['range_to'])
         tax_amount = float(request.form['tax_amount'])
 
+        clash = _slab_clash(range_from, range_to)
+        if clash:
+            flash(clash, "error")
+            return redirect(url_for('routes.professional_tax'))
+
         new_slab = ProfessionalTax(range_from=range_from, range_to=range_to, tax_amount=tax_amount)
         db.session.add(new_slab)
+        mark_pt_dirty([(range_from, range_to)])
+        bump_slab_version()
         db.session.commit()
+        invalidate_slab_index()
 
         flash(f"New tax slab added for ₹{int(range_from)}–₹{int(range_to)}.", "success")
         return redirect(url_for('routes.professional_tax'))
@@ -695,10 +1032,21 @@ def edit_tax(tax_id):
     slab = ProfessionalTax.query.get_or_404(tax_id)
 
     try:
-        slab.range_from = float(request.form['range_from'])
-        slab.range_to = float(request.form['range_to'])
+        range_from = float(request.form['range_from'])
+        range_to = float(request.form['range_to'])
+        clash = _slab_clash(range_from, range_to, exclude_id=slab.id)
+        if clash:
+            flash(clash, "error")
+            return redirect(url_for('routes.professional_tax'))
+
+        old_range = (slab.range_from, slab.range_to)
+        slab.range_from = range_from
+        slab.range_to = range_to
         slab.tax_amount = float(request.form['tax_amount'])
+        mark_pt_dirty([old_range, (range_from, range_to)])
+        bump_slab_version()
         db.session.commit()
+        invalidate_slab_index()
 
         flash("Tax slab updated successfully!", "success")
         return redirect(url_for('routes.professional_tax'))
@@ -718,7 +1066,10 @@ def delete_tax(tax_id):
     slab = ProfessionalTax.query.get(tax_id)
     if slab:
         db.session.delete(slab)
+        mark_pt_dirty([(slab.range_from, slab.range_to)])
+        bump_slab_version()
         db.session.commit()
+        invalidate_slab_index()
         flash("Tax slab deleted successfully.", "success")
     else:
         flash("Tax slab not found.", "error")
@@ -0,0 +1,126 @@
+# salary_history.py
+"""
+Effective-dated base salary history.
+
+Every change to a staff member's base pay is stored as a SalaryVersion
+(staff, amount, effective_from) where effective_from is the first day of the
+month the amount applies from. The base salary for any month is the version
+with the latest effective_from on or before that month; the
+(staff_id, effective_from) index answers that for every staff member in one
+query. Staff.base_salary keeps the latest amount for display.
+"""
+from datetime import date
+
+from sqlalchemy import and_, func, insert, literal, select, update
+from sqlalchemy.orm import aliased
+
+from models import db, Staff, SalaryVersion
+
+
+def period_start(month, year):
+    return date(year, month, 1)
+
+
+def month_start(value):
+    """First day of the month of a date or 'YYYY-MM[-DD]' string."""
+    if isinstance(value, str):
+        year, month = map(int, value.split('-')[:2])
+        return date(year, month, 1)
+    return date(value.year, value.month, 1)
+
+
+def _latest_versions(as_of):
+    """Subquery of (staff_id, effective_from) of each staff member's version in force on `as_of`."""
+    return select(SalaryVersion.staff_id, func.max(SalaryVersion.effective_from).label("effective_from")) \
+        .where(SalaryVersion.effective_from <= as_of) \
+        .group_by(SalaryVersion.staff_id) \
+        .subquery()
+
+
+def salaries_as_of(month, year, staff_ids=None):
+    """
+    {Staff.id: base salary in force for month/year}. Staff with no version
+    on or before that month fall back to Staff.base_salary.
+    """
+    latest = _latest_versions(period_start(month, year))
+    query = db.session.query(Staff.id, func.coalesce(SalaryVersion.amount, Staff.base_salary)) \
+        .outerjoin(latest, latest.c.staff_id == Staff.id) \
+        .outerjoin(SalaryVersion, and_(SalaryVersion.staff_id == latest.c.staff_id,
+                                       SalaryVersion.effective_from == latest.c.effective_from))
+    if staff_ids is not None:
+        query = query.filter(Staff.id.in_(staff_ids))
+    return dict(query.all())
+
+
+def salary_as_of(staff_id, month, year):
+    """Base salary of one staff member (Staff.id) in force for month/year."""
+    return salaries_as_of(month, year, [staff_id]).get(staff_id)
+
+
+def record_baseline_versions(condition=None):
+    """
+    Give every staff member (matching `condition`) that has no salary history
+    a first version of their current base_salary from the month they joined.
+    The caller commits.
+    """
+    has_version = select(SalaryVersion.id).where(SalaryVersion.staff_id == Staff.id).exists()
+    query = db.session.query(Staff.id, Staff.base_salary, Staff.date_joined).filter(~has_version)
+    if condition is not None:
+        query = query.filter(condition)
+    rows = [{"staff_id": pk, "amount": amount or 0, "effective_from": month_start(joined)}
+            for pk, amount, joined in query]
+    if rows:
+        db.session.execute(insert(SalaryVersion), rows)
+    return len(rows)
+
+
+def record_increment_versions(condition, effective_from, increased):
+    """
+    Apply an increment effective from `effective_from` to the salary history
+    of every staff member matching `condition`, set-based:
+
+    - versions already effective on or after that month are raised too, so a
+      back-dated increment carries through later revisions;
+    - staff without a version starting exactly that month get one, raised
+      from the amount in force just before it.
+
+    `increased` maps an amount column to the increased-amount expression.
+    Call before Staff.base_salary itself is updated; the caller commits.
+    """
+    effective_from = month_start(effective_from)
+    staff_ids = select(Staff.id).where(condition)
+    record_baseline_versions(condition)
+
+    db.session.execute(
+        update(SalaryVersion)
+        .where(SalaryVersion.staff_id.in_(staff_ids), SalaryVersion.effective_from >= effective_from)
+        .values(amount=increased(SalaryVersion.amount))
+        .execution_options(synchronize_session=False)
+    )
+
+    earlier = aliased(SalaryVersion)
+    previous_amount = select(earlier.amount) \
+        .where(earlier.staff_id == Staff.id, earlier.effective_from < effective_from) \
+        .order_by(earlier.effective_from.desc()) \
+        .limit(1) \
+        .scalar_subquery()
+    same_month = select(SalaryVersion.id).where(SalaryVersion.staff_id == Staff.id,
+                                                SalaryVersion.effective_from == effective_from).exists()
+    db.session.execute(
+        insert(SalaryVersion).from_select(
+            ["staff_id", "amount", "effective_from"],
+            select(Staff.id,
+                   increased(func.coalesce(previous_amount, Staff.base_salary)),
+                   literal(effective_from, db.Date))
+            .where(condition, ~same_month)
+        )
+    )
+
+
+def ensure_salary_versions(app):
+    """Backfill a baseline version for staff created before salary history existed."""
+    with app.app_context():
+        created = record_baseline_versions()
+        db.session.commit()
+        if created:
+            print(f"✅ Recorded baseline salary history for {created} staff")
@@ -0,0 +1,234 @@
+# staff_import.py
+"""
+Bulk staff import from CSV or Excel (.xlsx).
+
+Rows are streamed from the upload and validated one at a time; every valid
+row then gets a staff_id from one contiguous block allocated up front and is
+inserted in batches, each batch in its own transaction. Invalid rows (and
+rows of a batch the database rejects) are reported back with their line
+number instead of aborting the file.
+"""
+import csv
+import io
+import re
+from datetime import date, datetime
+
+from sqlalchemy import insert
+
+from models import db, Staff, allocate_staff_ids
+from salary_history import record_baseline_versions
+from staff_search import bump_staff_version
+
+BATCH_SIZE = 2000
+
+CATEGORIES = ["Admin", "Teaching", "Non-Teaching", "House-Keeping", "Driver"]
+REQUIRED_COLUMNS = ["name", "category", "department", "designation", "base_salary",
+                    "date_joined", "bank_account", "aadhar"]
+OPTIONAL_COLUMNS = ["epf_eligible", "esi_eligible", "allowances",
+                    "deductions", "pf_number", "esi_number"]
+
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+TRUE_VALUES = {"yes", "y", "true", "1"}
+FALSE_VALUES = {"no", "n", "false", "0", ""}
+
+
+class ImportFormatError(ValueError):
+    """Raised when the file itself can't be read (unknown type, missing columns)."""
+
+
+def _header_key(value):
+    return re.sub(r'[^a-z0-9]+', '_', str(value or '').strip().lower()).strip('_')
+
+
+def _iter_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    yield [_header_key(h) for h in header]
+    yield from reader
+
+
+def _iter_xlsx(stream):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield [_header_key(h) for h in header]
+        yield from rows
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(stream, filename):
+    """
+    Yield (line number, {column: raw value}) for each data row of an
+    uploaded CSV or .xlsx file.
+    """
+    lower = (filename or '').lower()
+    if lower.endswith('.csv'):
+        rows = _iter_csv(stream)
+    elif lower.endswith('.xlsx'):
+        rows = _iter_xlsx(stream)
+    else:
+        raise ImportFormatError("Unsupported file type: upload a .csv or .xlsx file.")
+
+    header = next(rows, None)
+    if not header:
+        raise ImportFormatError("The file is empty.")
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ImportFormatError(f"Missing required column(s): {', '.join(missing)}")
+
+    for line, values in enumerate(rows, start=2):
+        if not any(v not in (None, '') for v in values):
+            continue  # blank line
+        yield line, dict(zip(header, values))
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _digits(value):
+    """Text of an ID-like cell; Excel may hand back numbers (e.g. 123456789012.0)."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return _text(value)
+
+
+def _flag(value, field, errors):
+    text = _text(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    errors.append(f"{field} must be Yes or No")
+    return False
+
+
+def _amount(value, field, errors, required=False):
+    text = _text(value).replace(',', '')
+    if not text:
+        if required:
+            errors.append(f"{field} is required")
+        return 0.0
+    try:
+        amount = float(text)
+    except ValueError:
+        errors.append(f"{field} must be a number")
+        return 0.0
+    if amount < 0:
+        errors.append(f"{field} must not be negative")
+    return amount
+
+
+def _date(value, errors):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    errors.append("date_joined must be a date (YYYY-MM-DD or DD-MM-YYYY)")
+    return None
+
+
+def validate_row(raw):
+    """Return (Staff column values without staff_id, list of error messages)."""
+    errors = []
+    values = {
+        "name": _text(raw.get("name")),
+        "category": _text(raw.get("category")),
+        "department": _text(raw.get("department")),
+        "designation": _text(raw.get("designation")),
+        "base_salary": _amount(raw.get("base_salary"), "base_salary", errors, required=True),
+        "allowances": _amount(raw.get("allowances"), "allowances", errors),
+        "deductions": _amount(raw.get("deductions"), "deductions", errors),
+        "epf_eligible": _flag(raw.get("epf_eligible"), "epf_eligible", errors),
+        "esi_eligible": _flag(raw.get("esi_eligible"), "esi_eligible", errors),
+        "date_joined": _date(raw.get("date_joined"), errors),
+        "bank_account": _digits(raw.get("bank_account")),
+        "aadhar": _digits(raw.get("aadhar")),
+        "pf_number": _digits(raw.get("pf_number")) or None,
+        "esi_number": _digits(raw.get("esi_number")) or None,
+        "active": True,
+    }
+
+    for field in ("name", "department", "designation"):
+        if not values[field]:
+            errors.append(f"{field} is required")
+    if values["category"] not in CATEGORIES:
+        errors.append(f"category must be one of {', '.join(CATEGORIES)}")
+    if not re.fullmatch(r'\d{12}', values["aadhar"]):
+        errors.append("aadhar must be exactly 12 digits")
+    if not re.fullmatch(r'\d{9,18}', values["bank_account"]):
+        errors.append("bank_account must be 9 to 18 digits")
+    if values["date_joined"] and values["date_joined"] > date.today():
+        errors.append("date_joined must not be in the future")
+
+    return values, errors
+
+
+def import_staff(stream, filename, batch_size=BATCH_SIZE):
+    """
+    Validate and insert every row of the file.
+
+    Returns {"created": int, "staff_id_ranges": [(first, last)],
+             "errors": [{"line": int, "name": str, "errors": [str]}]}.
+    staff_id_ranges lists the staff_ids actually assigned; a batch the
+    database rejects leaves a gap in the allocated block.
+    Raises ImportFormatError if the file can't be read at all.
+    """
+    valid, report = [], []
+    for line, raw in iter_import_rows(stream, filename):
+        values, errors = validate_row(raw)
+        if errors:
+            report.append({"line": line, "name": values["name"], "errors": errors})
+        else:
+            valid.append((line, values))
+
+    if not valid:
+        return {"created": 0, "staff_id_ranges": [], "errors": report}
+
+    # One contiguous block of staff_ids for the whole file, in file order;
+    # commit right away so the sequence lock isn't held during the inserts
+    first_id = allocate_staff_ids(len(valid))
+    db.session.commit()
+
+    created, ranges = 0, []
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        rows = [dict(values, staff_id=first_id + start + i) for i, (_, values) in enumerate(batch)]
+        try:
+            db.session.execute(insert(Staff), rows)
+            record_baseline_versions(Staff.staff_id.between(rows[0]["staff_id"], rows[-1]["staff_id"]))
+            bump_staff_version()
+            db.session.commit()
+            created += len(rows)
+            if ranges and ranges[-1][1] + 1 == rows[0]["staff_id"]:
+                ranges[-1] = (ranges[-1][0], rows[-1]["staff_id"])
+            else:
+                ranges.append((rows[0]["staff_id"], rows[-1]["staff_id"]))
+        except Exception as e:
+            db.session.rollback()
+            message = f"Database error: {str(e).splitlines()[0]}"
+            report.extend({"line": line, "name": values["name"], "errors": [message]}
+                          for line, values in batch)
+
+    report.sort(key=lambda entry: entry["line"])
+    return {"created": created, "staff_id_ranges": ranges, "errors": report}
+
+
+def format_id_ranges(ranges):
+    """'1001-1500, 2001-2300' for [(1001, 1500), (2001, 2300)]."""
+    return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
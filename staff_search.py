@@ -0,0 +1,173 @@
+# staff_search.py
+"""
+In-process search index over Staff for staff_details and the type-ahead API.
+
+Leading-wildcard ILIKE can't use a B-tree index, so instead the (small) staff
+table is indexed in memory: an exact staff_id map, a sorted token list for
+prefix matches (bisect) and a trigram map for fuzzy matches. Staff inserts,
+deletes and changes to an indexed column bump the shared 'staff' DataVersion
+in the writing transaction (ORM writes through mapper events; bulk inserts
+call bump_staff_version()). Every worker compares that version before a
+search and rebuilds its index when it moved; invalidate_staff_index() also
+drops the local copy right away.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from sqlalchemy import event, inspect
+
+from models import db, Staff, bump_data_version, get_data_version
+
+STAFF_VERSION_KEY = 'staff'
+INDEXED_COLUMNS = ("staff_id", "name", "department")
+FUZZY_THRESHOLD = 0.35  # share of query trigrams that must match
+
+# Ranking weights
+SCORE_STAFF_ID_EXACT = 1000
+SCORE_STAFF_ID_PREFIX = 500
+SCORE_NAME_PREFIX = 300
+SCORE_NAME_TOKEN_PREFIX = 200
+SCORE_DEPARTMENT_PREFIX = 100
+SCORE_FUZZY = 100  # multiplied by the trigram match ratio
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse everything but letters/digits to single spaces."""
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StaffSearchIndex:
+    """Immutable snapshot of the searchable Staff fields."""
+
+    def __init__(self, rows):
+        # rows: (pk, staff_id, name, department)
+        self.by_staff_id = {}
+        self.staff_ids = []           # sorted (str staff_id, pk)
+        self.names = []               # sorted (normalized full name, pk)
+        self.tokens = []              # sorted (name token, pk)
+        self.departments = []         # sorted (normalized department, pk)
+        self.grams = defaultdict(set)  # trigram -> {pk}
+
+        for pk, staff_id, name, department in rows:
+            sid = str(staff_id)
+            self.by_staff_id[sid] = pk
+            self.staff_ids.append((sid, pk))
+            norm_name = normalize(name)
+            self.names.append((norm_name, pk))
+            for token in norm_name.split():
+                self.tokens.append((token, pk))
+            self.departments.append((normalize(department), pk))
+            for gram in trigrams(f"{norm_name} {normalize(department)}"):
+                self.grams[gram].add(pk)
+
+        for entries in (self.staff_ids, self.names, self.tokens, self.departments):
+            entries.sort()
+
+    @staticmethod
+    def _prefixed(entries, prefix):
+        """pks of sorted (key, pk) entries whose key starts with prefix."""
+        i = bisect.bisect_left(entries, (prefix,))
+        while i < len(entries) and entries[i][0].startswith(prefix):
+            yield entries[i][1]
+            i += 1
+
+    def search(self, query):
+        """Return staff pks matching `query`, best match first."""
+        q = normalize(query)
+        if not q:
+            return []
+        scores = defaultdict(float)
+
+        def bump(pk, score):
+            if score > scores[pk]:
+                scores[pk] = score
+
+        if q.isdigit():
+            if q in self.by_staff_id:
+                bump(self.by_staff_id[q], SCORE_STAFF_ID_EXACT)
+            for pk in self._prefixed(self.staff_ids, q):
+                bump(pk, SCORE_STAFF_ID_PREFIX)
+
+        for pk in self._prefixed(self.names, q):
+            bump(pk, SCORE_NAME_PREFIX)
+        first_word = q.split()[0]
+        for pk in self._prefixed(self.tokens, first_word):
+            bump(pk, SCORE_NAME_TOKEN_PREFIX)
+        for pk in self._prefixed(self.departments, q):
+            bump(pk, SCORE_DEPARTMENT_PREFIX)
+
+        if len(q) >= 3:
+            query_grams = trigrams(q)
+            hits = defaultdict(int)
+            for gram in query_grams:
+                for pk in self.grams.get(gram, ()):
+                    hits[pk] += 1
+            for pk, count in hits.items():
+                ratio = count / len(query_grams)
+                if ratio >= FUZZY_THRESHOLD:
+                    bump(pk, SCORE_FUZZY * ratio)
+
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+_lock = threading.Lock()
+_version = 0
+_loaded = {"version": None, "index": None}
+
+
+def bump_staff_version(connection=None):
+    """Bump the shared staff version; call in the transaction of a bulk Staff insert."""
+    bump_data_version(STAFF_VERSION_KEY, connection)
+
+
+def invalidate_staff_index():
+    """Drop this process's index; call after Staff rows are added or renamed."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def get_staff_index():
+    shared = get_data_version(STAFF_VERSION_KEY)
+    with _lock:
+        version = (_version, shared)
+        if _loaded["index"] is None or _loaded["version"] != version:
+            rows = db.session.query(Staff.id, Staff.staff_id, Staff.name, Staff.department).all()
+            _loaded.update(index=StaffSearchIndex(rows), version=version)
+        return _loaded["index"]
+
+
+@event.listens_for(Staff, 'after_insert')
+@event.listens_for(Staff, 'after_delete')
+def _staff_added_or_removed(mapper, connection, target):
+    bump_staff_version(connection)
+
+
+@event.listens_for(Staff, 'after_update')
+def _staff_renamed(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[c].history.has_changes() for c in INDEXED_COLUMNS):
+        bump_staff_version(connection)
+
+
+def search_staff(query, page=1, per_page=25):
+    """
+    Ranked, paginated staff search. Returns (staff list for the page, total matches);
+    the page's Staff rows are loaded with a single primary-key IN query.
+    """
+    pks = get_staff_index().search(query)
+    total = len(pks)
+    page_pks = pks[(page - 1) * per_page: page * per_page]
+    if not page_pks:
+        return [], total
+    by_pk = {s.id: s for s in Staff.query.filter(Staff.id.in_(page_pks))}
+    return [by_pk[pk] for pk in page_pks if pk in by_pk], total
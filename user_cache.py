@@ -0,0 +1,117 @@
+# user_cache.py
+"""
+In-process cache for Flask-Login's user_loader.
+
+Without it every authenticated request (including each /api call from the
+D&R page) reads its User row. Cached entries are detached, read-only
+UserSnapshot objects holding just the id, username and role flags, so role
+checks such as current_user.is_accounts never touch the users table. Entries
+expire after USER_CACHE_TTL seconds. Updating or deleting a User through the
+ORM (role flags, password) bumps the shared 'users' DataVersion in the same
+transaction; every load compares that version (one primary-key read) and a
+worker drops all its snapshots once it moved, so a demoted or deleted user
+loses their old roles on every worker at once. Bulk UPDATEs on the users
+table bypass the ORM events; call bump_user_version() in their transaction.
+
+With EXPOSE_USER_QUERY_COUNT enabled, every response carries an
+X-User-Queries header with the number of SQL statements on the users table
+the request ran (0 on the hot path).
+"""
+import re
+import threading
+import time
+
+from flask import g, has_request_context
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from models import db, User, bump_data_version, get_data_version
+
+USER_VERSION_KEY = 'users'
+SNAPSHOT_FIELDS = ("id", "username", "is_admin", "is_accounts", "is_hr", "is_superuser")
+_USERS_TABLE = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+[`"]?users[`"]?(?:\s|$)', re.IGNORECASE)
+
+
+class UserSnapshot(UserMixin):
+    """Immutable copy of a User's identity and role flags."""
+    __slots__ = SNAPSHOT_FIELDS
+
+    def __init__(self, **values):
+        for field in SNAPSHOT_FIELDS:
+            object.__setattr__(self, field, values.get(field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserSnapshot is read-only")
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.username}>"
+
+
+_lock = threading.Lock()
+_cache = {}  # user id -> (expires at, UserSnapshot)
+_cached_version = {"users": None}  # shared 'users' version the snapshots were loaded at
+_ttl = 300
+
+
+def bump_user_version(connection=None):
+    """Bump the shared users version; call in any transaction that changes User rows."""
+    bump_data_version(USER_VERSION_KEY, connection)
+
+
+def invalidate_user(user_id=None):
+    """Drop one user's cached snapshot, or every snapshot if user_id is None."""
+    with _lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(int(user_id), None)
+
+
+def load_cached_user(user_id):
+    """Flask-Login user_loader: cached UserSnapshot, or None for an unknown id."""
+    user_id = int(user_id)
+    now = time.monotonic()
+    shared = get_data_version(USER_VERSION_KEY)
+    with _lock:
+        if _cached_version["users"] != shared:
+            _cache.clear()  # some worker changed a user since these were loaded
+            _cached_version["users"] = shared
+        entry = _cache.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    row = db.session.query(*[getattr(User, field) for field in SNAPSHOT_FIELDS]) \
+        .filter(User.id == user_id).first()
+    if row is None:
+        return None
+    snapshot = UserSnapshot(**row._asdict())
+    with _lock:
+        _cache[user_id] = (now + _ttl, snapshot)
+    return snapshot
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    bump_user_version(connection)
+    invalidate_user(target.id)
+
+
+def _count_user_queries(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and _USERS_TABLE.search(statement):
+        g.user_queries = g.get('user_queries', 0) + 1
+
+
+def init_user_cache(app):
+    """Apply USER_CACHE_TTL and, if enabled, the X-User-Queries response header."""
+    global _ttl
+    _ttl = app.config.get('USER_CACHE_TTL', _ttl)
+
+    if app.config.get('EXPOSE_USER_QUERY_COUNT'):
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', _count_user_queries)
+
+        @app.after_request
+        def add_user_query_header(response):
+            response.headers['X-User-Queries'] = str(g.get('user_queries', 0))
+            return response
@@ -2,7 +2,9 @@
 import math
 import calendar
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence, Union
+
+import numpy as np
 
 def calculate_salary_components(
     gross_salary: float,
@@ -87,3 +89,95 @@ def calculate_salary_components(
     }
 
     return result
+
+
+# ============================================================
+# BATCH (VECTORIZED) SALARY COMPUTATION
+# ============================================================
+def _as_column(values, size: int, dtype=float) -> np.ndarray:
+    """Broadcast a scalar or sequence to a 1-D column, treating None/NaN as 0."""
+    column = np.asarray(values if values is not None else 0, dtype=float)
+    column = np.nan_to_num(column, nan=0.0)
+    return np.broadcast_to(column, (size,)).astype(dtype)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly like Python's built-in round(x, 2).
+
+    np.round scales by 100 before rounding, which can land on the other side of
+    a .5 boundary than Python's correctly-rounded decimal logic. Only values
+    sitting on that boundary are re-rounded with the built-in.
+    """
+    scaled = values * 100
+    rounded = np.round(scaled) / 100
+    suspect = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if suspect.any():
+        rounded[suspect] = [round(float(v), 2) for v in values[suspect]]
+    return rounded
+
+
+def calculate_salary_components_batch(
+    gross_salary: Sequence[float],
+    lop_days: Sequence[float],
+    deductions: Dict[str, Sequence[float]],
+    reimbursements: Sequence[float],
+    month: int,
+    year: int,
+    epf_eligible: Union[bool, Sequence[bool]] = True,
+    esi_eligible: Union[bool, Sequence[bool]] = True
+) -> Dict[str, np.ndarray]:
+    """
+    Column-wise version of calculate_salary_components for one month/year.
+
+    Every argument is a column with one entry per employee (scalars are
+    broadcast). `deductions` maps each deduction name to its column and
+    `reimbursements` holds the per-employee reimbursement totals. Returns a
+    dict with the same keys as the scalar function, each an array whose
+    values are identical to calling the scalar function row by row.
+    """
+    gross_salary = np.nan_to_num(np.asarray(gross_salary, dtype=float), nan=0.0)
+    size = gross_salary.shape[0]
+    lop_days = _as_column(lop_days, size)
+    epf_mask = _as_column(epf_eligible, size, dtype=bool)
+    esi_mask = _as_column(esi_eligible, size, dtype=bool)
+
+    days_in_month = calendar.monthrange(year, month)[1]
+
+    # Step 2/3: LOP amount and adjusted gross
+    lop_amount = (lop_days / days_in_month) * gross_salary
+    adjusted_gross = gross_salary - lop_amount
+
+    # Step 4: EPF & ESI on rounded-up LOP days
+    rounded_lop = np.ceil(lop_days)
+    lop_amount_for_epf_esi = (rounded_lop / days_in_month) * gross_salary
+    adjusted_gross_for_epf_esi = gross_salary - lop_amount_for_epf_esi
+
+    epf = np.where(epf_mask, np.ceil(adjusted_gross_for_epf_esi * 0.70 * 0.12), 0.0)
+    esi = np.where(esi_mask, np.ceil(adjusted_gross_for_epf_esi * 0.0075), 0.0)
+
+    # Step 5/6: manual deductions (summed in the same order as the scalar path)
+    total_manual_deductions = np.zeros(size)
+    for column in (deductions or {}).values():
+        total_manual_deductions = total_manual_deductions + _as_column(column, size)
+    total_reimbursements = _as_column(reimbursements, size)
+
+    # Step 7/8: totals and net
+    total_deductions = epf + esi + total_manual_deductions
+    net_salary = adjusted_gross - total_deductions + total_reimbursements
+
+    return {
+        "gross_salary": _round2(gross_salary),
+        "lop_days": lop_days,
+        "lop_amount": _round2(lop_amount),
+        "rounded_lop": rounded_lop.astype(np.int64),
+        "lop_amount_for_epf_esi": _round2(lop_amount_for_epf_esi),
+        "adjusted_gross": _round2(adjusted_gross),
+        "adjusted_gross_for_epf_esi": _round2(adjusted_gross_for_epf_esi),
+        "epf": _round2(epf),
+        "esi": _round2(esi),
+        "total_manual_deductions": _round2(total_manual_deductions),
+        "total_reimbursements": _round2(total_reimbursements),
+        "total_deductions": _round2(total_deductions),
+        "net_salary": _round2(net_salary),
+    }